@@ -0,0 +1,49 @@
+"""Benchmark bulk_parse() scaling across worker counts.
+
+$ python benchmarks/bench_bulk.py [n_lines] [chunksize]
+
+Parses N_LINES data type references (and the same references as
+human-readable strings) in this process, then with 1, 2, 4, ... workers
+up to the number of CPUs.
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from biblelib import bulk, core
+
+from bench_dtr import random_dtrs
+
+
+def userstring(ref):
+    """Return a human-readable string for REF, or a bad one. """
+    try:
+        return ref.userstring()
+    except (AttributeError, AssertionError):
+        # None, or a book without an abbreviation
+        return 'Mrak 4:9'
+
+
+def main(n=1000000, chunksize=10000):
+    dtrs = random_dtrs(n)
+    refs, _ = core.parse_dtr_batch(dtrs[:10000], errors='filter')
+    humans = [userstring(ref) for ref in refs]
+    humans = (humans * (n // len(humans) + 1))[:n]
+    cpus = os.cpu_count() or 1
+    workercounts = [0] + [2 ** i for i in range(cpus.bit_length()) if 2 ** i <= cpus]
+    for kind, lines in [('dtr', dtrs), ('human', humans)]:
+        for workers in workercounts:
+            start = time.perf_counter()
+            errors = sum(1 for result in bulk.bulk_parse(lines, kind=kind, workers=workers,
+                                                         chunksize=chunksize)
+                         if result.error)
+            seconds = time.perf_counter() - start
+            print("{:>5} workers={}: {:.2f}s, {:.0f}k lines/s, {} errors".format(
+                kind, workers, seconds, n / seconds / 1000, errors))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,63 @@
+"""Benchmark parse_dtr_batch() against calling makeBiblerefFromDTR()
+for each reference.
+
+$ python benchmarks/bench_dtr.py [n_refs]
+
+About 1% of the references are invalid, and errors='filter' is used
+for both.
+"""
+
+import os
+import random
+import sys
+import timeit
+import warnings
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from biblelib import books, core
+
+
+def random_dtrs(n, seed=1):
+    """Return N data type references, verses and verse ranges, with
+    every hundredth one invalid."""
+    rng = random.Random(seed)
+    dtrs = []
+    for i in range(n):
+        book = books.Book(rng.randint(1, 87))
+        first = rng.randrange(book.n_verses)
+        chapter, verse = book.get_vindex_chapter_verse(first)
+        dtr = 'bible.{}.{}.{}'.format(book.index, chapter, verse)
+        if i % 3 == 0:
+            chapter, verse = book.get_vindex_chapter_verse(min(book.n_verses - 1, first + rng.randrange(30)))
+            dtr += '-{}.{}.{}'.format(book.index, chapter, verse)
+        if i % 100 == 99:
+            dtr = dtr.replace('bible', 'bibel')
+        dtrs.append(dtr)
+    return dtrs
+
+
+def main(n=100000):
+    dtrs = random_dtrs(n)
+
+    def percall():
+        # a fresh cache each time, so neither has an advantage
+        core.get_reference_cache().clear()
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            return [core.makeBiblerefFromDTR(dtr, errors='filter') for dtr in dtrs]
+
+    def batch():
+        core.get_reference_cache().clear()
+        return core.parse_dtr_batch(dtrs, errors='filter')
+
+    refs, errors = batch()
+    assert refs == percall()
+    print("{} references, {} errors".format(n, len(errors)))
+    for name, fn in [('per call', percall), ('batch', batch)]:
+        seconds = min(timeit.repeat(fn, number=1, repeat=3))
+        print("{:>10}: {:.3f}s, {:.0f}k refs/s".format(name, seconds, n / seconds / 1000))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
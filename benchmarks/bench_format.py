@@ -0,0 +1,47 @@
+"""Benchmark format_many() against calling the reference methods for
+each reference.
+
+$ python benchmarks/bench_format.py [n_refs]
+
+The references are a mix of verses and verse ranges (see bench_dtr.py),
+rendered in each style, and as userstrings in every language.
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from biblelib import core
+from biblelib.biblebooks import LANGUAGES
+
+from bench_dtr import random_dtrs
+
+
+def main(n=100000):
+    refs, errors = core.parse_dtr_batch(random_dtrs(n), errors='filter')
+    refs = [ref for ref in refs if ref is not None]
+    print("{} references".format(len(refs)))
+    cases = [(style, 'en') for style in core.FORMAT_STYLES] + \
+        [('userstring', language) for language in LANGUAGES[1:]]
+    for style, language in cases:
+        if style == 'userstring':
+            def permethod():
+                return [ref.userstring(language) for ref in refs]
+        else:
+            def permethod():
+                return [getattr(ref, style)() for ref in refs]
+
+        def many():
+            return core.format_many(refs, style=style, language=language)
+
+        assert many() == permethod()
+        print("{} ({}):".format(style, language))
+        for name, fn in [('per method', permethod), ('format_many', many)]:
+            seconds = min(timeit.repeat(fn, number=1, repeat=3))
+            print("{:>12}: {:.3f}s, {:.2f}M strings/s".format(name, seconds, len(refs) / seconds / 1e6))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
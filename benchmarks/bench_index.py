@@ -0,0 +1,59 @@
+"""Benchmark ReferenceIndex queries against a naive scan.
+
+$ python benchmarks/bench_index.py [n_records]
+"""
+
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from biblelib import core, books
+from biblelib.index import ReferenceIndex
+
+
+def random_records(n, seed=1):
+    """Return N (RangeVerseref, int) records of up to 30 verses. """
+    rng = random.Random(seed)
+    records = []
+    for i in range(n):
+        book = books.Book(rng.randint(1, 87))
+        first = rng.randrange(book.n_verses)
+        last = min(book.n_verses - 1, first + rng.randrange(30))
+        start = core.VerserefFromIndex(book=book.index, index=first)
+        end = core.VerserefFromIndex(book=book.index, index=last)
+        records.append((core.makeRangeref(start, end) if first != last else start, i))
+    return records
+
+
+def main(n=100000):
+    records = random_records(n)
+    queries = [ref for ref, _ in random_records(200, seed=2)]
+    seconds = timeit.timeit(lambda: ReferenceIndex(records), number=1)
+    print("build {} records: {:.3f}s".format(n, seconds))
+    refindex = ReferenceIndex(records)
+
+    def naive():
+        return [[value for ref, value in records if ref.overlaps(query)] for query in queries]
+
+    def indexed():
+        return [refindex.overlapping(query) for query in queries]
+
+    def counted():
+        return [refindex.overlapping(query, count=True) for query in queries]
+
+    assert [sorted(result) for result in naive()] == [sorted(result) for result in indexed()]
+    for name, fn, number in [('naive scan', naive, 1), ('overlapping', indexed, 100),
+                             ('overlapping count', counted, 100)]:
+        seconds = timeit.timeit(fn, number=number) / number
+        print("{:>20}: {:10.1f} us/query".format(name, seconds / len(queries) * 1e6))
+    # one long record shouldn't slow down queries about short ones
+    refindex.insert(core.Bookref(19), 'Psalms')
+    seconds = timeit.timeit(indexed, number=100) / 100
+    print("{:>20}: {:10.1f} us/query".format('with Psalms', seconds / len(queries) * 1e6))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
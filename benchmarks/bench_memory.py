@@ -0,0 +1,36 @@
+"""Measure the memory used by reference objects.
+
+$ python benchmarks/bench_memory.py [n_books]
+
+Builds a Verseref for every verse in the first N_BOOKS books (all 87
+by default), bypassing the intern cache, and reports bytes per object.
+"""
+
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from biblelib import books, core
+
+
+def main(n_books=87):
+    chapterverses = [(book.index, chapter, verse)
+                     for book in books._books[1:n_books + 1]
+                     for chapter in book.get_chapters()
+                     for verse in range(1, book.get_finalverse(chapter) + 1)]
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    verses = [core.Verseref(book=book, chapter=chapter, verse=verse)
+              for book, chapter, verse in chapterverses]
+    # include the refid strings, which are computed lazily
+    refids = sum(len(vref.refid) for vref in verses)
+    after = tracemalloc.take_snapshot()
+    size = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    print("{} Verserefs: {:.1f} MB, {:.0f} bytes each".format(
+        len(verses), size / 2**20, size / len(verses)))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
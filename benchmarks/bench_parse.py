@@ -0,0 +1,84 @@
+"""Benchmark Parser throughput, and book name matching against the
+single regular expression alternation it used to use.
+
+Parsing is timed with the memo off, and on for input where a thousand
+distinct references repeat, like editorial data. Then it's timed for
+the same references as userstrings in each language.
+
+$ python benchmarks/bench_parse.py [n_refs]
+"""
+
+import os
+import random
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from biblelib import books, core, parse
+from biblelib.biblebooks import LANGUAGES
+
+
+def random_strings(n, seed=1):
+    """Return N human-readable references using random book names."""
+    rng = random.Random(seed)
+    strings = []
+    for i in range(n):
+        book = books.Book(rng.randint(1, 66))
+        chapter, verse = book.get_vindex_chapter_verse(rng.randrange(book.n_verses))
+        name = rng.choice(sorted(book.get_names() | set(book.alternates)))
+        if i % 2:
+            strings.append('{} {}:{}'.format(name, chapter, verse))
+        else:
+            strings.append('{} {}'.format(name, chapter))
+    return strings
+
+
+def main(n=100000):
+    strings = random_strings(n)
+    regexp = re.compile('(?P<biblebook>{}) (?P<ref>.+)'.format('|'.join(books.get_all_booknames())))
+    parser = parse.Parser(cachesize=0)
+    repeated = [strings[i % 1000] for i in range(n)]
+    memoparser = parse.Parser()
+
+    def old_match():
+        return [regexp.fullmatch(string) for string in strings]
+
+    def trie_match():
+        return [parse.match_bookname(string) for string in strings]
+
+    def trie_match_i():
+        return [parse.match_bookname(string, ignorecase=True) for string in strings]
+
+    def parse_all():
+        return [parser.parse(string) for string in strings]
+
+    def parse_repeated():
+        return [parser.parse(string) for string in repeated]
+
+    def parse_repeated_memo():
+        memoparser.clear_cache()
+        return [memoparser.parse(string) for string in repeated]
+
+    for name, fn in [('regexp book', old_match), ('trie book', trie_match),
+                     ('trie book, ignorecase', trie_match_i), ('parse', parse_all),
+                     ('parse repeated', parse_repeated), ('parse repeated, memo', parse_repeated_memo)]:
+        seconds = min(timeit.repeat(fn, number=1, repeat=3))
+        print("{:>24}: {:.3f}s, {:.0f}k refs/s".format(name, seconds, n / seconds / 1000))
+
+
+    print(memoparser.cache_stats())
+
+    refs = [parser.parse(string) for string in strings]
+    for language in LANGUAGES:
+        languageparser = parse.Parser(cachesize=0, language=language)
+        userstrings = core.format_many(refs, language=language)
+        assert [languageparser.parse(string) for string in userstrings] == refs
+        seconds = min(timeit.repeat(lambda: [languageparser.parse(string) for string in userstrings],
+                                    number=1, repeat=3))
+        print("{:>24}: {:.3f}s, {:.0f}k refs/s".format('parse ' + language, seconds, n / seconds / 1000))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
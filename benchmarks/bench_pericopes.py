@@ -0,0 +1,87 @@
+"""Benchmark loading a pericope set: streaming with iterparse, against
+parsing the whole document and querying it with xpath, and loading a
+binary snapshot.
+
+$ python benchmarks/bench_pericopes.py [verses_per_pericope]
+
+Writes a temporary file with pericopes of VERSES_PER_PERICOPE verses
+covering every book, and reports load time and peak memory. Each
+loader runs in a fresh process, and memory is its maximum resident
+set size, since libxml2's allocations aren't visible to tracemalloc.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import os
+import resource
+import sys
+import tempfile
+import time
+
+from lxml import etree
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from biblelib import books, core
+from biblelib.pericopes import PericopeSet
+
+
+def write_pericopes(path, size):
+    """Write pericopes of SIZE verses to PATH, returning how many."""
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('<?xml version="1.0" encoding="utf-8"?>\n<pericopes>\n')
+        for book in books._books[1:]:
+            for first in range(0, book.n_verses, size):
+                last = min(book.n_verses, first + size) - 1
+                start = core.VerserefFromIndex(book=book.index, index=first)
+                end = core.VerserefFromIndex(book=book.index, index=last)
+                ref = core.makeRangeref(start, end) if first != last else start
+                count += 1
+                f.write('  <pericope ref="{}"><title>Paragraph {}</title></pericope>\n'.format(
+                    ref.refid, count))
+        f.write('</pericopes>\n')
+    return count
+
+
+def read_xpath(path):
+    """Load pericopes the way PericopeSet.read() used to."""
+    ps = PericopeSet()
+    pstr = etree.parse(open(path))
+    for el in pstr.xpath('/pericopes/*'):
+        ps.add(el.xpath('string(@ref)'), el.xpath('string(title)'))
+    return ps
+
+
+def read_iterparse(path):
+    ps = PericopeSet()
+    ps.read(pdir=os.path.dirname(path), file=os.path.basename(path))
+    return ps
+
+
+def load(fn, path):
+    """Return seconds to load PATH with FN, and max RSS in MB."""
+    start = time.perf_counter()
+    fn(path)
+    seconds = time.perf_counter() - start
+    return seconds, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def read_snapshot(path):
+    return PericopeSet.load_snapshot(path + '.snapshot')
+
+
+def main(size=1):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, 'pericopes.xml')
+        count = write_pericopes(path, size)
+        print("{} pericopes, {:.1f} MB".format(count, os.path.getsize(path) / 2**20))
+        read_iterparse(path).save_snapshot(path + '.snapshot')
+        for name, fn in [('xpath', read_xpath), ('iterparse', read_iterparse),
+                         ('snapshot', read_snapshot)]:
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                seconds, maxrss = executor.submit(load, fn, path).result()
+            print("{:>10}: {:.3f}s, max RSS {:.1f} MB".format(name, seconds, maxrss))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
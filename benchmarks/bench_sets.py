@@ -0,0 +1,51 @@
+"""Benchmark ReferenceSet algebra against Python sets of Verserefs from
+enumerateverses().
+
+$ python benchmarks/bench_sets.py [n_refs]
+
+Each side covers N random verse ranges: one set is built from the
+first half, the other from the second.
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from biblelib import core, sets
+
+from bench_dtr import random_dtrs
+
+
+def verses(ref):
+    return ref.enumerateverses() if isinstance(ref, core.RangeVerseref) else [ref]
+
+
+def main(n=20000):
+    refs, errors = core.parse_dtr_batch(random_dtrs(n), errors='filter')
+    refs = [ref for ref in refs if ref is not None]
+    halves = refs[:len(refs) // 2], refs[len(refs) // 2:]
+    pysets = [set(verse for ref in half for verse in verses(ref)) for half in halves]
+    refsets = [sets.ReferenceSet(half) for half in halves]
+    assert len(refsets[0] | refsets[1]) == len(pysets[0] | pysets[1])
+    assert len(refsets[0] & refsets[1]) == len(pysets[0] & pysets[1])
+    print("{} references, {} and {} verses".format(len(refs), *map(len, refsets)))
+    cases = [
+        ('build set', lambda: set(verse for ref in halves[0] for verse in verses(ref))),
+        ('build ReferenceSet', lambda: sets.ReferenceSet(halves[0])),
+        ('set |, &, -, ^', lambda: (pysets[0] | pysets[1], pysets[0] & pysets[1],
+                                   pysets[0] - pysets[1], pysets[0] ^ pysets[1])),
+        ('ReferenceSet |, &, -, ^', lambda: (refsets[0] | refsets[1], refsets[0] & refsets[1],
+                                            refsets[0] - refsets[1], refsets[0] ^ refsets[1])),
+        ('ReferenceSet len', lambda: len(refsets[0])),
+        ('ReferenceSet to refs', lambda: list(refsets[0])),
+    ]
+    for name, fn in cases:
+        number = 10
+        seconds = min(timeit.repeat(fn, number=number, repeat=3)) / number
+        print("{:>24}: {:.1f}us".format(name, seconds * 1e6))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,55 @@
+"""Benchmark mapping verses between datatypes: compiling the tables
+for a datatype, mapping ordinals one at a time and as a NumPy array,
+and mapping reference objects.
+
+$ python benchmarks/bench_versification.py [n_ordinals]
+"""
+
+import os
+import random
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+
+from biblelib import books, core, versification
+
+from bench_dtr import random_dtrs
+
+
+def main(n=1000000):
+    start = time.perf_counter()
+    bhs = versification.get_versification('bible+bhs')
+    versification.get_mapping('bible', 'bible+bhs')
+    print("compile bible+bhs: {:.1f}ms".format((time.perf_counter() - start) * 1000))
+    # only books bible+bhs has data for
+    rng = random.Random(1)
+    mapped = [ordinal for ordinal in range(books.n_ordinals)
+              if books.get_ordinal_bcv(ordinal)[0] not in bhs.unmapped]
+    ordinals = [rng.choice(mapped) for i in range(n)]
+    array = np.array(ordinals, dtype=np.int32)
+    refs, errors = core.parse_dtr_batch(random_dtrs(n // 10), errors='filter')
+    refs = [ref for ref in refs if ref is not None and ref.book not in bhs.unmapped]
+
+    def one_at_a_time():
+        map_ordinal = versification.map_ordinal
+        return [map_ordinal(ordinal, 'bible', 'bible+bhs') for ordinal in ordinals]
+
+    def vectorized():
+        return versification.map_ordinals(array, 'bible', 'bible+bhs')
+
+    def references():
+        return [ref.to_bibletype('bible+bhs') for ref in refs]
+
+    assert one_at_a_time() == vectorized().tolist()
+    for name, fn, count in [('map_ordinal', one_at_a_time, n), ('map_ordinals', vectorized, n),
+                            ('to_bibletype', references, len(refs))]:
+        seconds = min(timeit.repeat(fn, number=1, repeat=3))
+        print("{:>14}: {:.3f}s, {:.2f}M/s".format(name, seconds, count / seconds / 1e6))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,8 @@
+"""Run the command-line tool: python -m biblelib. See cli.py. """
+
+import sys
+
+from .cli import main
+
+
+sys.exit(main())
@@ -0,0 +1,303 @@
+"""Columns of Bible references backed by NumPy arrays.
+
+For bulk work (a column from Parquet or pandas, say), building a
+reference object per row is slow. A ReferenceArray keeps parallel
+integer arrays instead, and does parsing, validation, sorting and
+containment a whole column at a time. Requires numpy.
+
+>>> from biblelib import arrays, core
+>>> refs = arrays.ReferenceArray.from_dtr(['bible.62.4.9', 'bible.62.4.1-62.4.9', 'bible.61.5'])
+>>> refs.verse_count()
+array([ 1,  9, 48], dtype=int32)
+>>> refs.contains(core.makeBiblerefFromDTR('bible.62.4'))
+array([ True,  True, False])
+>>> refs.sort().to_dtr()
+['bible.61.5', 'bible.62.4.1-62.4.9', 'bible.62.4.9']
+>>> refs[0]
+Verseref('bible.62.4.9')
+
+Rows follow the makeBibleref conventions: chapter=0 if there's no
+chapter, verse=-1 if there's no verse, and verse=0 for Psalm titles.
+Non-range rows have endchapter=0 and endverse=-1. Rows that can't be
+parsed have book=0, and are flagged by validate().
+
+Rows are validated, and numbered with ordinals, by the versification
+of their own datatype (see versification.py), like reference objects.
+
+"""
+
+import re
+
+import numpy as np
+
+from . import books
+from .core import (BIBLE_DATATYPES, GenericBibleref, ReferenceValidationError,
+                   makeBibleref, makeRangeref)
+from .versification import get_versification
+
+
+# bibletype codes: ordered like core._BIBLETYPE_RANKS, so sort keys agree
+_BIBLETYPES = sorted(BIBLE_DATATYPES)
+_BIBLETYPE_CODES = {bibletype: code for code, bibletype in enumerate(_BIBLETYPES)}
+
+# for each bibletype code, one row per book and one column per chapter
+# (see _fill_tables())
+_MAXCHAPTER = max(book.get_finalchapter() for book in books._books[1:])
+# final verse for each book and chapter, 0 if there's no such chapter
+_FINALVERSES = np.zeros((len(_BIBLETYPES), 88, _MAXCHAPTER + 1), dtype=np.int32)
+# ordinal of the first verse of each book and chapter
+_CHAPTERSTARTS = np.zeros((len(_BIBLETYPES), 88, _MAXCHAPTER + 1), dtype=np.int32)
+# first and last ordinal of each book
+_BOOKFIRSTS = np.zeros((len(_BIBLETYPES), 88), dtype=np.int32)
+_BOOKLASTS = np.zeros((len(_BIBLETYPES), 88), dtype=np.int32)
+# bibletype codes whose tables are filled in
+_FILLED = set()
+
+
+def _fill_tables(bibletype):
+    """Fill in the tables for the bibletype codes in the array
+    BIBLETYPE from their versifications, the first time each is used,
+    and return BIBLETYPE clipped to valid codes."""
+    bibletype = np.clip(bibletype, 0, len(_BIBLETYPES) - 1)
+    for code in np.unique(bibletype).tolist():
+        if code in _FILLED:
+            continue
+        versification = get_versification(_BIBLETYPES[code])
+        for index in range(1, 88):
+            book = versification.get_book(index)
+            assert book.get_finalchapter() <= _MAXCHAPTER, f"Too many chapters in {book}"
+            _BOOKFIRSTS[code, index], _BOOKLASTS[code, index] = book.get_ordinals()
+            for chapter, finalverse in book.finalverses.items():
+                _FINALVERSES[code, index, chapter] = finalverse
+                _CHAPTERSTARTS[code, index, chapter] = book.get_ordinal(chapter, 1)
+        _FILLED.add(code)
+    return bibletype
+
+
+# a DTR per line, with the fallback catching anything else. Letter suffixes on
+# verses, like the a in 'bible.62.4.9a', are dropped as in core
+_DTR_REGEXP = re.compile(r"^(?:({})\.(\d+)(?:\.(\d+)(?:\.(\d+|title)(?:(?<=\d)[a-z]+)?)?)?"
+                         r"(?:[-–](\d+)(?:\.(\d+)(?:\.(\d+|title)(?:(?<=\d)[a-z]+)?)?)?)?|(.*))$".format(
+                             '|'.join(re.escape(bibletype) for bibletype in _BIBLETYPES)),
+                         re.M)
+
+
+def _intcolumn(column, default):
+    """Convert an array of digit strings to ints, with DEFAULT for
+    empty strings."""
+    column = np.where(column == 'title', '0', column)
+    column = np.where(column == '', str(default), column).astype(np.int64)
+    return np.clip(column, -1, 2**16).astype(np.int32)
+
+
+class ReferenceArray(object):
+    """Parallel arrays of reference components. """
+    columns = ('bibletype', 'book', 'chapter', 'verse', 'endchapter', 'endverse')
+
+    def __init__(self, bibletype, book, chapter, verse, endchapter=None, endverse=None):
+        """Each argument is an array-like of ints, all the same length.
+        BIBLETYPE is an index into sorted(core.BIBLE_DATATYPES).
+        """
+        self.bibletype = np.asarray(bibletype, dtype=np.int8)
+        self.book = np.asarray(book, dtype=np.int32)
+        self.chapter = np.asarray(chapter, dtype=np.int32)
+        self.verse = np.asarray(verse, dtype=np.int32)
+        n = len(self.book)
+        self.endchapter = (np.zeros(n, dtype=np.int32) if endchapter is None
+                           else np.asarray(endchapter, dtype=np.int32))
+        self.endverse = (np.full(n, -1, dtype=np.int32) if endverse is None
+                         else np.asarray(endverse, dtype=np.int32))
+        assert all(len(getattr(self, column)) == n for column in self.columns), \
+          "All columns must have the same length"
+
+    def __repr__(self):
+        return "<ReferenceArray: {} references>".format(len(self))
+
+    def __len__(self):
+        return len(self.book)
+
+    def __getitem__(self, key):
+        """With an integer, return a reference object. Otherwise
+        (a slice, mask, or index array), return a ReferenceArray."""
+        if isinstance(key, (int, np.integer)):
+            return self._makeref(*(int(getattr(self, column)[key]) for column in self.columns))
+        return ReferenceArray(*(getattr(self, column)[key] for column in self.columns))
+
+    @staticmethod
+    def _makeref(bibletype, book, chapter, verse, endchapter, endverse):
+        bibletype = _BIBLETYPES[bibletype]
+        start = makeBibleref(bibletype=bibletype, book=book, chapter=chapter, verse=verse)
+        if not endchapter:
+            return start
+        end = makeBibleref(bibletype=bibletype, book=book, chapter=endchapter, verse=endverse)
+        return makeRangeref(start=start, end=end)
+
+    @classmethod
+    def from_refs(cls, refs):
+        """Build a ReferenceArray from an iterable of reference objects. """
+        rows = []
+        for ref in refs:
+            assert isinstance(ref, GenericBibleref), f"Not a Bibleref: {ref}"
+            start, end = ref.start, ref.end
+            row = [_BIBLETYPE_CODES[ref.bibletype], ref.book,
+                   getattr(start, 'chapter', 0), getattr(start, 'verse', -1), 0, -1]
+            if start is not end:
+                row[4:] = [end.chapter, getattr(end, 'verse', -1)]
+            rows.append(row)
+        return cls(*np.array(rows, dtype=np.int32).reshape(-1, 6).T)
+
+    @classmethod
+    def from_dtr(cls, refs, errors='strict'):
+        """Parse an iterable of data type reference strings like
+        'bible.62.4.1-62.4.9' into a ReferenceArray.
+
+        With errors='strict', raise a ReferenceValidationError if any
+        are invalid. With errors='filter', invalid references become
+        rows with book=0.
+        """
+        assert errors in ['strict', 'filter'], f"Invalid errors value: {errors}"
+        refs = list(refs)
+        if not refs:
+            return cls(*[[]] * 6)
+        groups = np.array(_DTR_REGEXP.findall('\n'.join(refs)), dtype=str).reshape(-1, 8)
+        if len(groups) != len(refs):
+            raise ValueError("References can't contain newlines")
+        unparsed = (groups[:, 7] != '') | (groups[:, 1] == '')
+        bibletype = np.zeros(len(refs), dtype=np.int8)
+        for code, name in enumerate(_BIBLETYPES):
+            bibletype[groups[:, 0] == name] = code
+        book = _intcolumn(groups[:, 1], 0)
+        chapter = _intcolumn(groups[:, 2], 0)
+        verse = _intcolumn(groups[:, 3], -1)
+        endbook = _intcolumn(groups[:, 4], 0)
+        endchapter = _intcolumn(groups[:, 5], 0)
+        endverse = _intcolumn(groups[:, 6], -1)
+        isrange = endbook > 0
+        # like makeRangeref: mixed chapter and verse ends become verse 1
+        endverse = np.where(isrange & (verse >= 0) & (endverse < 0), 1, endverse)
+        verse = np.where(isrange & (verse < 0) & (endverse >= 0), 1, verse)
+        # ranges must have chapters, and stay within a book
+        unparsed |= isrange & ((endbook != book) | (chapter == 0) | (endchapter == 0))
+        book[unparsed] = 0
+        array = cls(bibletype, book, chapter, verse, endchapter, endverse)
+        if errors == 'strict':
+            invalid = ~array.validate()
+            if invalid.any():
+                i = int(np.flatnonzero(invalid)[0])
+                raise ReferenceValidationError(
+                    "{} invalid references, first is {}: {}".format(invalid.sum(), i, refs[i]))
+        return array
+
+    def validate(self):
+        """Return a boolean mask of rows that are valid references
+        according to the chapter and verse tables for their datatypes
+        (see versification.py)."""
+        bibletype = _fill_tables(self.bibletype)
+        book = np.clip(self.book, 0, 87)
+        chapter = np.clip(self.chapter, 0, _MAXCHAPTER)
+        endchapter = np.clip(self.endchapter, 0, _MAXCHAPTER)
+        finalverses = _FINALVERSES[bibletype, book, chapter]
+        endfinalverses = _FINALVERSES[bibletype, book, endchapter]
+        valid = (self.book >= 1) & (self.book <= 87)
+        # chapter and verse, if present, must exist
+        valid &= (self.chapter == 0) | ((self.chapter == chapter) & (finalverses > 0))
+        valid &= (self.verse <= finalverses) & ((self.verse < 0) | (self.chapter > 0))
+        isrange = self.endchapter > 0
+        valid &= ~isrange | ((self.endchapter == endchapter) & (endfinalverses > 0))
+        valid &= ~isrange | (self.endverse <= endfinalverses)
+        # ranges must be in order
+        first, last = self._ordinals(bibletype, book, chapter, endchapter)
+        valid &= ~isrange | (first <= last)
+        return valid
+
+    def _ordinals(self, bibletype, book, chapter, endchapter):
+        chapterstarts = _CHAPTERSTARTS[bibletype, book, chapter]
+        first = np.where(self.chapter == 0, _BOOKFIRSTS[bibletype, book],
+                         chapterstarts + np.maximum(self.verse, 1) - 1)
+        # the end is the start for non-ranges
+        isrange = self.endchapter > 0
+        endchapter = np.where(isrange, endchapter, chapter)
+        endverse = np.where(isrange, self.endverse, self.verse)
+        endchapterstarts = _CHAPTERSTARTS[bibletype, book, endchapter]
+        last = np.where(endchapter == 0, _BOOKLASTS[bibletype, book],
+                        np.where(endverse < 0,
+                                 endchapterstarts + _FINALVERSES[bibletype, book, endchapter] - 1,
+                                 endchapterstarts + np.maximum(endverse, 1) - 1))
+        return first, last
+
+    def ordinals(self):
+        """Return arrays of the first and last ordinals of each row, as
+        its datatype numbers them. Only meaningful for valid rows."""
+        return self._ordinals(_fill_tables(self.bibletype),
+                              np.clip(self.book, 0, 87),
+                              np.clip(self.chapter, 0, _MAXCHAPTER),
+                              np.clip(self.endchapter, 0, _MAXCHAPTER))
+
+    def sortkeys(self):
+        """Return an int64 array of sort keys, ordered like the
+        sortkey attribute of reference objects."""
+        def pack(chapter, verse):
+            return ((((self.bibletype.astype(np.int64) << 7 | self.book) << 8 | chapter) << 8)
+                    | (verse + 1))
+        start = pack(self.chapter, self.verse)
+        isrange = self.endchapter > 0
+        end = np.where(isrange, pack(self.endchapter, self.endverse), start)
+        return start << 32 | end
+
+    def argsort(self):
+        return np.argsort(self.sortkeys(), kind='stable')
+
+    def sort(self):
+        """Return a sorted copy."""
+        return self[self.argsort()]
+
+    def unique(self):
+        """Return a sorted copy without duplicates."""
+        _, indices = np.unique(self.sortkeys(), return_index=True)
+        return self[indices]
+
+    def verse_count(self):
+        """Return an array of the number of verses in each row."""
+        first, last = self.ordinals()
+        return last - first + 1
+
+    def contains(self, ref):
+        """Return a boolean mask of rows whose verses are all within
+        REF, a reference object."""
+        first, last = self.ordinals()
+        return ((self.bibletype == _BIBLETYPE_CODES[ref.bibletype]) &
+                (first >= ref.ordinals[0]) & (last <= ref.ordinals[1]))
+
+    def overlaps(self, ref):
+        """Return a boolean mask of rows sharing at least one verse with
+        REF, a reference object."""
+        first, last = self.ordinals()
+        return ((self.bibletype == _BIBLETYPE_CODES[ref.bibletype]) &
+                (first <= ref.ordinals[1]) & (last >= ref.ordinals[0]))
+
+    def to_dtr(self):
+        """Return a list of data type reference strings. Invalid rows
+        become None."""
+        def part(chapter, verse):
+            if not chapter:
+                return ''
+            if verse < 0:
+                return '.{}'.format(chapter)
+            return '.{}.{}'.format(chapter, verse if verse else 'title')
+
+        dtrs = []
+        for bibletype, book, chapter, verse, endchapter, endverse in zip(
+                *(getattr(self, column).tolist() for column in self.columns)):
+            if not book:
+                dtrs.append(None)
+                continue
+            dtr = '{}.{}{}'.format(_BIBLETYPES[bibletype], book, part(chapter, verse))
+            if endchapter:
+                dtr += '-{}{}'.format(book, part(endchapter, endverse))
+            dtrs.append(dtr)
+        return dtrs
+
+    def to_refs(self):
+        """Return a list of reference objects."""
+        return [self._makeref(*row) for row in zip(
+            *(getattr(self, column).tolist() for column in self.columns))]
@@ -1,11 +1,34 @@
-# ToDo: add a list of valid languages and test against it
+"""Localized book abbreviations.
+
+book_labels() returns a tuple of abbreviations for a language, indexed
+by book number, computed once and shared: reference rendering (see
+core.format_many()) looks books up there rather than going through
+Abbreviations.
+"""
+
+# languages with abbreviations for every book
+LANGUAGES = ['en', 'de', 'es', 'pt', 'ko', 'zh-Hans', 'zh-Hant']
+
+# language -> tuple of abbreviations by book index (None for 0)
+_BOOK_LABELS = {}
+
+
+def book_labels(language="en"):
+    """Return a tuple of the abbreviations for every book in LANGUAGE,
+    indexed by book number."""
+    labels = _BOOK_LABELS.get(language)
+    if labels is None:
+        assert language in LANGUAGES, f"Invalid language: {language}"
+        labels = _BOOK_LABELS[language] = tuple(
+            [None] + [data[language] for data in _biblebookabbreviations])
+    return labels
 
 
 class Abbreviations(object):
     """Deliver a localized abbreviation for a Bible book given an English index or abbreviation. 
 
 """
-    languages = []
+    languages = LANGUAGES
     def __init__(self, language="en"):
         # index by 1
         self.language = language
@@ -16,7 +39,7 @@ class Abbreviations(object):
                                         for data in _biblebookabbreviations}
 
     def abbreviation_for_index(self, index, language):
-        assert index > 1 and index <= 87, f"Invalid index: {index}"
+        assert index >= 1 and index <= 87, f"Invalid index: {index}"
         return self.index_abbreviations[index][language]
 
     def abbreviation_for_en(self, abbrev, language):
@@ -5,7 +5,7 @@
 # Copyright: Copyright (C) 2018 Logos Bible Software
 # License: Public Domain
 
-from .client import API
+from .client import API, AsyncAPI
 
-__all__ = ['API' ]
+__all__ = ['API', 'AsyncAPI']
 
@@ -0,0 +1,161 @@
+"""Persistent caching of Biblia API results.
+
+API results are cached in memory by default, in a MemoryCache, and so
+lost when the process ends. SQLiteCache keeps them in a file instead,
+so they survive restarts and can be shared by several processes:
+
+>>> import os, tempfile
+>>> from biblelib.biblia import cache, client
+>>> path = os.path.join(tempfile.mkdtemp(), 'biblia.sqlite')
+>>> apicache = cache.SQLiteCache(path, ttl=7 * 24 * 3600, maxsize=100000)
+>>> api = client.API(key, cache=apicache)
+
+Entries older than TTL seconds are ignored (and deleted), and once
+there are more than MAXSIZE entries, the oldest are evicted.
+
+"""
+
+from collections import OrderedDict
+import json
+import sqlite3
+import threading
+import time
+
+
+class MemoryCache(object):
+    """A mapping from string keys to values in memory, evicting the
+    least recently used once there are more than MAXSIZE.
+
+    It's safe to use from several threads (see AsyncAPI).
+    """
+    def __init__(self, maxsize=4096):
+        assert maxsize >= 0, f"Invalid maxsize: {maxsize}"
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._values = OrderedDict()
+
+    def __repr__(self):
+        return "<MemoryCache: {} of {} entries>".format(len(self), self.maxsize)
+
+    def __len__(self):
+        return len(self._values)
+
+    def get(self, key, default=None):
+        """Return the value for KEY, or DEFAULT if it's not cached."""
+        with self._lock:
+            value = self._values.get(key)
+            if value is None:
+                return default
+            self._values.move_to_end(key)
+            return value
+
+    def __contains__(self, key):
+        return key in self._values
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._values[key] = value
+            self._values.move_to_end(key)
+            while len(self._values) > self.maxsize:
+                self._values.popitem(last=False)
+
+    def clear(self):
+        """Delete all entries."""
+        with self._lock:
+            self._values.clear()
+
+
+class SQLiteCache(object):
+    """A mapping from string keys to JSON-serializable values, stored
+    in an SQLite database at PATH.
+
+    If TTL is None, entries don't expire; if MAXSIZE is None, the cache
+    is unbounded.
+    """
+    def __init__(self, path, ttl=None, maxsize=None):
+        assert ttl is None or ttl >= 0, f"Invalid ttl: {ttl}"
+        assert maxsize is None or maxsize >= 0, f"Invalid maxsize: {maxsize}"
+        self.path = path
+        self.ttl = ttl
+        self.maxsize = maxsize
+        # the connection can be used from executor threads (see
+        # AsyncAPI), but only one at a time
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._db:
+            self._db.execute("CREATE TABLE IF NOT EXISTS cache "
+                             "(key TEXT PRIMARY KEY, value TEXT, created REAL)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS cache_created ON cache (created)")
+            # a running estimate of the number of entries, so inserts
+            # needn't count them: it includes inserts that replace an
+            # entry and misses other processes', so entries are only
+            # counted properly once it passes maxsize
+            self._count = self._db.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def __repr__(self):
+        return "<SQLiteCache: {} ({} entries)>".format(self.path, len(self))
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def _expired(self, created):
+        return self.ttl is not None and created + self.ttl < time.time()
+
+    def get(self, key, default=None):
+        """Return the value for KEY, or DEFAULT if it's not cached or
+        has expired."""
+        with self._lock:
+            row = self._db.execute("SELECT value, created FROM cache WHERE key = ?",
+                                   (key,)).fetchone()
+            if row is None:
+                return default
+            if self._expired(row[1]):
+                with self._db:
+                    self._count -= self._db.execute("DELETE FROM cache WHERE key = ?", (key,)).rowcount
+                return default
+        return json.loads(row[0])
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        with self._lock, self._db:
+            self._db.execute("INSERT OR REPLACE INTO cache (key, value, created) VALUES (?, ?, ?)",
+                             (key, json.dumps(value), time.time()))
+            self._count += 1
+            if self.maxsize is not None and self._count > self.maxsize:
+                self._count = self._db.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+                excess = self._count - self.maxsize
+                if excess > 0:
+                    self._db.execute("DELETE FROM cache WHERE key IN "
+                                     "(SELECT key FROM cache ORDER BY created LIMIT ?)", (excess,))
+                    self._count = self.maxsize
+
+    def expire(self):
+        """Delete all expired entries."""
+        if self.ttl is not None:
+            with self._lock, self._db:
+                self._count -= self._db.execute("DELETE FROM cache WHERE created < ?",
+                                                (time.time() - self.ttl,)).rowcount
+
+    def clear(self):
+        """Delete all entries."""
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM cache")
+            self._count = 0
+
+    def close(self):
+        self._db.close()
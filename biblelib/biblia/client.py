@@ -24,6 +24,14 @@ u'And he said, \u201cWhoever has ears to hear, let him hear!\u201d'
 >>> bib.tag(text='Does Mark 4:9 occur in here??')
 u'{"text":"Does <a href=\\"http://ref.ly/Mark4.9\\">Mark 4:9</a> occur in here??"}'
 
+Results are cached in memory. To keep them across restarts, pass a
+persistent cache (see cache.py):
+
+>>> import os, tempfile
+>>> from biblelib.biblia.cache import SQLiteCache
+>>> path = os.path.join(tempfile.mkdtemp(), 'biblia.sqlite')
+>>> api = client.API(key, cache=SQLiteCache(path, ttl=86400))
+
 """
 
 # Version: 0.4
@@ -31,14 +39,60 @@ u'{"text":"Does <a href=\\"http://ref.ly/Mark4.9\\">Mark 4:9</a> occur in here??
 # Copyright: Copyright (C) 2010 Logos Bible Software
 # License: Public Domain
 
-from collections import namedtuple
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 import json
+import re
 import requests
+from requests.adapters import HTTPAdapter
 # import urllib
 # import urllib2
 
+from .cache import MemoryCache
+from ..parse import match_bookname
+
+
+# one verse per line, each starting with a reference like 'Mark 4:9'
+_VERSE_LINE_REGEXP = re.compile(r"(?P<chapter>\d+):(?P<verse>\d+)\s*(?P<text>.*)")
+
+
+def merge_refs(refs):
+    """Return a sorted list of references covering the verses in REFS,
+    merging any that overlap or are adjacent in the same book."""
+    merged = []
+    for ref in sorted(refs, key=lambda ref: ref.ordinals):
+        union = merged[-1].union(ref) if merged else [ref]
+        if len(union) == 1:
+            merged[-1:] = union
+        else:
+            merged.append(ref)
+    return merged
+
+
+def _passage(ref):
+    """Return a passage string for REF that the API can parse."""
+    return ref.userstring().replace('–', '-')
 
-__all__ = ('API')
+
+def _verse_texts(text):
+    """Return a dict mapping ordinals to verse texts, from TEXT with one
+    verse per line starting with its full reference. Lines that don't
+    start with one are added to the previous verse."""
+    texts = {}
+    ordinal = None
+    for line in text.splitlines():
+        m = match_bookname(line)
+        verse_match = m and _VERSE_LINE_REGEXP.match(m[1])
+        if verse_match:
+            ordinal = m[0].get_ordinal(int(verse_match.group('chapter')), int(verse_match.group('verse')))
+            texts[ordinal] = verse_match.group('text').strip()
+        elif ordinal is not None and line.strip():
+            texts[ordinal] += ' ' + line.strip()
+    return texts
+
+
+__all__ = ('API', 'AsyncAPI')
 
 
 # ToDo:
@@ -50,21 +104,41 @@ class API(object):
     Caching assumes JSON data, so some API options aren't supported: 
     YMMV.
 
+    Requests go through a pooled requests.Session, so connections are
+    kept alive and reused.
+
     """
     # includes the API version information
     base = "https://api.biblia.com/v1/bible"
-    # cache results for efficiency
-    _cache = {}
+    # cache results for efficiency: shared by instances without their
+    # own cache
+    _cache = MemoryCache(maxsize=4096)
     
-    def __init__(self, api_key, format='txt'):
+    def __init__(self, api_key, format='txt', base=None, cache=None, pool_maxsize=10):
         """Construct a new BibliaAPI instance for a given API key.
         
         api_key: The API key as obtained from Biblia.
         format: The format for Bible content. Use either "txt" for plain text, or "html". 
+        base: Override the base URL, e.g. for a local test server.
+        cache: Where to cache results, e.g. a cache.SQLiteCache to keep
+          them across restarts. Anything with get() and item assignment will do.
+        pool_maxsize: The most connections kept open to the server.
         """
         self.api_key = api_key
         assert format in ['txt', 'html'], f'Invalid format: {format}'
         self.default_format = format
+        if base:
+            self.base = base.rstrip('/')
+        if cache is not None:
+            self._cache = cache
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def close(self):
+        """Close pooled connections."""
+        self.session.close()
         
     def content(self, bible='LEB.html.json', **kwargs):
         """Scan TEXT which is presumed to be a Bible reference, rendering
@@ -108,6 +182,39 @@ class API(object):
             'tag_markdown: incompatible tagFormat {}'.format(kwargs.get('tagFormat'))
         return self.tag(tagFormat='[{text}](https://ref.ly/logosref/bible.{query})', **kwargs)
 
+    def content_many(self, refs, bible='LEB.txt.json'):
+        """Return a list of the plain texts of REFS, a sequence of
+        Bibleref objects, from BIBLE.
+
+        Overlapping and adjacent references are merged first (see
+        merge_refs), so only the fewest passages are fetched. Verses
+        are joined with spaces.
+        """
+        refs = list(refs)
+        merged = merge_refs(refs)
+        results = [self._content_lines(bible, ref) for ref in merged]
+        return self._split_content(refs, results)
+
+    def _content_lines(self, bible, ref):
+        """Return content for REF with one verse per line."""
+        return self.content(bible=bible, passage=_passage(ref), style='oneVersePerLineFullReference')
+
+    @staticmethod
+    def _split_content(refs, results):
+        """Return the text of each of REFS from RESULTS, content for
+        the merged references."""
+        texts = {}
+        for result in results:
+            texts.update(_verse_texts(result.get('text', '')))
+        return [' '.join(texts[ordinal] for ordinal in ref.iterverses(form='ordinal') if ordinal in texts)
+                for ref in refs]
+
+    def _cachekey(self, form, args):
+        """Return a cache key for FORM and ARGS at this instance's base
+        URL that doesn't depend on the order of ARGS. Instances with
+        different bases can share a cache."""
+        return json.dumps([self.base, form, sorted(args.items())], ensure_ascii=False)
+
     def _biblia_get(self, form, args):
         """FORM is the URL fragment for a recognize service. ARGS are a dict
         of the appropriate arguments for that service. No checking
@@ -116,13 +223,93 @@ class API(object):
 
         """
         baseurl = f'{self.base}/{form}'
-        # tuple-ify so it can be hashed for the cache
-        argstuple = tuple(args.items())
-        if argstuple not in self._cache:
-            args.update(key=self.api_key)
-            response = requests.get(baseurl, params=args)
-            if response.status_code == 200:
-                self._cache[argstuple] = response.json()
-            else:
-                response.raise_for_status()
-        return self._cache[argstuple]
+        key = self._cachekey(form, args)
+        result = self._cache.get(key)
+        if result is None:
+            response = self.session.get(baseurl, params=dict(args, key=self.api_key))
+            response.raise_for_status()
+            result = self._cache[key] = response.json()
+        return result
+
+
+class AsyncAPI(API):
+    """Biblia API functionality for asyncio: the same methods as API,
+    but each returns an awaitable.
+
+    >>> api = client.AsyncAPI(key, concurrency=8)
+    >>> texts = await asyncio.gather(*[api.content(passage=passage) for passage in passages])
+
+    At most CONCURRENCY requests are sent at once (through a thread
+    pool, using the pooled session). Responses with a status in
+    RETRY_STATUSES (like 429 Too Many Requests) are retried up to
+    RETRIES times, waiting BACKOFF seconds, then twice as long each
+    time, or as long as the server's Retry-After says. Identical
+    requests in flight at the same time are only sent once, and all
+    callers get the result. Results go in the same cache as API's,
+    unless CACHE is given.
+    """
+    RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+
+    def __init__(self, api_key, format='txt', base=None, cache=None,
+                 concurrency=10, retries=3, backoff=0.5):
+        assert concurrency > 0, f'Invalid concurrency: {concurrency}'
+        super().__init__(api_key, format=format, base=base, cache=cache, pool_maxsize=concurrency)
+        self.concurrency = concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self._executor = ThreadPoolExecutor(max_workers=concurrency)
+        # created on first use in each event loop
+        self._semaphore = None
+        self._loop = None
+        # cache key: future for requests in flight
+        self._inflight = {}
+
+    def close(self):
+        """Close pooled connections and threads."""
+        self._executor.shutdown(wait=False)
+        super().close()
+
+    async def _biblia_get(self, form, args):
+        """Like API._biblia_get(), but coalescing identical requests
+        and retrying when the server is busy. The cache is used from
+        the thread pool too, since it may be on disk."""
+        key = self._cachekey(form, args)
+        future = self._inflight.get(key)
+        if future is None:
+            future = self._inflight[key] = asyncio.ensure_future(self._fetch(form, args, key))
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # one caller being cancelled shouldn't cancel the others
+        return await asyncio.shield(future)
+
+    async def content_many(self, refs, bible='LEB.txt.json'):
+        """Like API.content_many(), but fetching passages concurrently."""
+        refs = list(refs)
+        merged = merge_refs(refs)
+        results = await asyncio.gather(*[self._content_lines(bible, ref) for ref in merged])
+        return self._split_content(refs, results)
+
+    def _retry_delay(self, response, attempt):
+        """Return how long to wait before retrying after RESPONSE."""
+        retryafter = response.headers.get('Retry-After', '')
+        if retryafter.isdigit():
+            return int(retryafter)
+        return self.backoff * 2 ** attempt
+
+    async def _fetch(self, form, args, key):
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(self._executor, self._cache.get, key)
+        if result is not None:
+            return result
+        if loop is not self._loop:
+            self._loop, self._semaphore = loop, asyncio.Semaphore(self.concurrency)
+        get = partial(self.session.get, f'{self.base}/{form}', params=dict(args, key=self.api_key))
+        async with self._semaphore:
+            for attempt in range(self.retries + 1):
+                response = await loop.run_in_executor(self._executor, get)
+                if response.status_code not in self.RETRY_STATUSES or attempt == self.retries:
+                    break
+                await asyncio.sleep(self._retry_delay(response, attempt))
+        response.raise_for_status()
+        result = response.json()
+        await loop.run_in_executor(self._executor, self._cache.__setitem__, key, result)
+        return result
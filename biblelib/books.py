@@ -34,11 +34,23 @@ and chapter ranges (like bible.62.2-62.3)
 >>> mark.get_vindex_dtr(115)
 'bible.62.4.8'
 
+## ordinals
+
+An ordinal is like a vindex, but counts verses across the whole Bible
+(all 87 books), so integer comparison of ordinals orders verses
+canonically. 
+
+>>> mark.get_ordinal(4, 8)
+31918
+>>> mark.get_ordinals(4)
+(31911, 31951)
+
 TODO:
 - rewrite BibleBook using dataclasses?
 
 '"""
 
+from bisect import bisect_right
 from collections import defaultdict
 
 
@@ -97,6 +109,21 @@ class BibleBook(object):
             self.vindexdict[chapter] = vsum
         # the total number of verses for vindex checking
         self.n_verses = vsum
+        # prefix sums: the vindex of the first verse of each chapter,
+        # parallel to the sorted chapter indices. Not every book starts
+        # at chapter 1 or has contiguous chapters (EpJer, Ode).
+        self._chapters = sorted(self.finalverses)
+        self._chapterstarts = []
+        vsum = 0
+        for chapter in self._chapters:
+            self._chapterstarts.append(vsum)
+            vsum += self.finalverses[chapter]
+        self._chapteroffsets = dict(zip(self._chapters, self._chapterstarts))
+        # dense vindex -> (chapter, verse) table: see get_vindex_table()
+        self._vindextable = None
+        # position of the book's first verse in the whole Bible: see
+        # _assign_ordinal_offsets()
+        self.ordinal_offset = None
         self.canons = self.assign_canons()
         
 
@@ -156,20 +183,48 @@ class BibleBook(object):
         """Return the zero-based vindex for chapter and verse."""
         chapter = int(chapter)
         verse = int(verse)
-        vindex = (self.vindexdict.get(chapter-1) + verse) - 1
+        vindex = (self._chapteroffsets[chapter] + verse) - 1
         assert vindex < self.n_verses, \
           'Verse {} exceeds the index for chapter {}'.format(chapter, verse)
         return vindex
 
+    def get_ordinal(self, chapter, verse):
+        """Return the zero-based ordinal for chapter and verse across
+        the whole Bible. 
+
+        Psalm titles (verse 0) share the ordinal of verse 1.
+        """
+        return self.ordinal_offset + self.get_vindex(chapter, max(int(verse), 1))
+
+    def get_ordinals(self, chapter=None):
+        """Return a tuple of the first and last ordinals for CHAPTER, or
+        for the whole book if CHAPTER is None."""
+        if chapter is None:
+            return (self.ordinal_offset, self.ordinal_offset + self.n_verses - 1)
+        chapter = int(chapter)
+        return (self.get_ordinal(chapter, 1),
+                self.get_ordinal(chapter, self.get_finalverse(chapter)))
+
     def get_vindex_chapter_verse(self, vindex):
-        """Return the Bible data type string for vindex."""
-        pairs = [(c, v)for c,v in self.vindexdict.items()
-                 if v < vindex]
-        if pairs:
-            c, v = max(pairs, key=lambda p: p[1])
-            return (c + 1, vindex - v + 1)
-        else:
-            return (1, vindex + 1)
+        """Return a tuple of chapter and verse for vindex."""
+        assert 0 <= vindex < self.n_verses, \
+          'Invalid vindex {} for {}'.format(vindex, self.shortname)
+        if self._vindextable:
+            return self._vindextable[vindex]
+        i = bisect_right(self._chapterstarts, vindex) - 1
+        return (self._chapters[i], vindex - self._chapterstarts[i] + 1)
+
+    def get_vindex_table(self):
+        """Return a list mapping every vindex to a (chapter, verse) tuple.
+
+        Built on first use, after which get_vindex_chapter_verse() also
+        uses it.
+        """
+        if self._vindextable is None:
+            self._vindextable = [(chapter, verse)
+                                 for chapter in self._chapters
+                                 for verse in range(1, self.finalverses[chapter] + 1)]
+        return self._vindextable
 
     def get_vindex_dtr(self, vindex):
         """Return the Bible data type string for vindex."""
@@ -489,6 +544,66 @@ for book in _books[1:]:
                 
 
 
+def _assign_ordinal_offsets():
+    """Number the verses of all books consecutively.
+
+    Like vindex, an ordinal is zero-based, but it runs across book
+    boundaries, so every verse in the Bible gets a distinct integer.
+    Returns the total number of ordinals.
+    """
+    offset = 0
+    for book in _books[1:]:
+        book.ordinal_offset = offset
+        offset += book.n_verses
+    return offset
+
+n_ordinals = _assign_ordinal_offsets()
+_ordinal_offsets = [book.ordinal_offset for book in _books[1:]]
+
+
+def get_ordinal_bcv(ordinal):
+    """Return a tuple of book index, chapter and verse for ORDINAL."""
+    assert 0 <= ordinal < n_ordinals, f"Invalid ordinal: {ordinal}"
+    book = _books[bisect_right(_ordinal_offsets, ordinal)]
+    return (book.index, *book.get_vindex_chapter_verse(ordinal - book.ordinal_offset))
+
+
+def _assign_verse_sums():
+    """Return a dict mapping None and each canon tradition to a list of
+    cumulative verse counts by book index: item I is the number of
+    verses in books 1 through I, counting only books in the canon."""
+    verse_sums = {}
+    for tradition in [None] + BibleBook.canon_traditions:
+        sums = [0]
+        for book in _books[1:]:
+            counted = tradition is None or book.in_canon(tradition)
+            sums.append(sums[-1] + (book.n_verses if counted else 0))
+        verse_sums[tradition] = sums
+    return verse_sums
+
+_verse_sums = _assign_verse_sums()
+_canon_book_counts = {tradition: sum(book.in_canon(tradition) for book in _books[1:])
+                      for tradition in BibleBook.canon_traditions}
+
+
+def count_verses(first=1, last=None, canon_tradition=None):
+    """Return the number of verses in the books with indices FIRST
+    through LAST (default: the last book), in constant time. With
+    CANON_TRADITION, only count books in that canon."""
+    assert canon_tradition in _verse_sums, f"Invalid canon tradition: {canon_tradition}"
+    sums = _verse_sums[canon_tradition]
+    if last is None:
+        last = len(sums) - 1
+    assert 1 <= first <= last < len(sums), f"Invalid book indices: {first}, {last}"
+    return sums[last] - sums[first - 1]
+
+
+def count_books(canon_tradition):
+    """Return the number of books in CANON_TRADITION."""
+    assert canon_tradition in _canon_book_counts, f"Invalid canon tradition: {canon_tradition}"
+    return _canon_book_counts[canon_tradition]
+
+
 def get_all_booknames():
     "For building regexp reference matchers"
     return {name for book in _books[1:] for name in book.get_names() | set(book.alternates)}
@@ -0,0 +1,187 @@
+"""Parse very large numbers of references in parallel.
+
+Lines are read in chunks and parsed in worker processes. Results come
+back in input order as compact values rather than pickled reference
+objects:
+
+* 'ordinals': a (first, last) tuple of ordinals (see books.py)
+* 'indices': the reference's indices(), like ('bible', 62, 4, 9)
+* 'refid': the data type reference string, like 'bible.62.4.9'
+* 'userstring', 'refly_url', 'logosref_uri': the result of the
+  reference method with that name
+
+Input is data type references ('dtr'), human-readable references
+('human'), or the output of logosref_uri() ('logosref') or refly_url()
+('reflyref'): those two are converted to data type references. A
+logosref URI leaves out the end chapter of a verse range, so
+'logosref:Bible.Mk4.30-5' is read as Mk 4:30–5, which is an error.
+
+>>> from biblelib import bulk
+>>> with open('refs.txt') as f:
+...     for result in bulk.bulk_parse(f, kind='human', workers=4):
+...         if result.error:
+...             print(result)
+BulkResult(line=3, value=None, error='ReferenceParserError: No book name found: Mrak 4:9')
+
+Each line should hold one reference: leading and trailing whitespace
+is ignored.
+
+"""
+
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+import os
+import re
+
+from . import core
+from .books import Book
+from .parse import Parser
+
+
+KINDS = ['dtr', 'human', 'logosref', 'reflyref']
+OUTPUTS = ['ordinals', 'indices', 'refid', 'userstring', 'refly_url', 'logosref_uri']
+
+# LINE counts from 1. VALUE is None if there was an ERROR message
+BulkResult = namedtuple('BulkResult', ['line', 'value', 'error'])
+
+# one per worker process, so its memo is reused across chunks
+_parser = None
+
+# what precedes a Logos reference like 'Bible.Mk4.9' for each KIND
+_LOGOSREF_PREFIXES = {'logosref': 'logosref:', 'reflyref': 'https://ref.ly/logosref/'}
+# bible type, book, then optional chapter, verse, end chapter or verse,
+# and end verse after a colon
+_LOGOSREF_REGEXP = re.compile(r"^(\w+)\.((?:\d )?[A-Za-z][A-Za-z ]*)"
+                              r"(?:(\d+)(?:\.(\d+))?(?:-(\d+)(?::(\d+))?)?)?$")
+_LOGOSREF_BOOKS = {Book(index).ldlsrefname: index for index in range(1, 88)}
+
+
+def _convert(ref, output):
+    if output == 'ordinals':
+        return ref.ordinals
+    elif output == 'indices':
+        return ref.indices()
+    elif output == 'refid':
+        return ref.refid
+    return getattr(ref, output)()
+
+
+def _logosref_to_dtr(line, prefix):
+    """Return the data type reference for LINE, a Logos reference
+    after PREFIX, or raise ValueError."""
+    match = _LOGOSREF_REGEXP.match(line[len(prefix):]) if line.startswith(prefix) else None
+    if not match:
+        raise ValueError(f"Invalid Logos reference: {line}")
+    machinetype, bookname, chapter, verse, end, endverse = match.groups()
+    if (machinetype not in core.HUMAN_BIBLE_DATATYPES or bookname not in _LOGOSREF_BOOKS
+            or (endverse and not verse)):
+        raise ValueError(f"Invalid Logos reference: {line}")
+    book = _LOGOSREF_BOOKS[bookname]
+    dtr = "{}.{}".format(core.HUMAN_BIBLE_DATATYPES[machinetype], book)
+    if chapter:
+        dtr += f".{chapter}"
+        if verse:
+            # titles are verse 0
+            dtr += ".{}".format('title' if verse == '0' else verse)
+    if endverse:
+        dtr += f"-{book}.{end}.{endverse}"
+    elif end:
+        dtr += f"-{book}.{chapter}.{end}" if verse else f"-{book}.{end}"
+    return dtr
+
+
+def _error_message(e):
+    return '{}: {}'.format(type(e).__name__, e)
+
+
+def _parse_chunk(kind, output, lines):
+    """Return a list of converted values for LINES, with None for
+    errors, and a list of (index, message) tuples for the errors,
+    including any converting to OUTPUT."""
+    global _parser
+    lines = [line.strip() for line in lines]
+    errors = []
+    if kind in _LOGOSREF_PREFIXES:
+        # convert to DTRs, with None for errors
+        prefix, dtrs = _LOGOSREF_PREFIXES[kind], []
+        for index, line in enumerate(lines):
+            try:
+                dtrs.append(_logosref_to_dtr(line, prefix))
+            except ValueError as e:
+                dtrs.append(None)
+                errors.append((index, _error_message(e)))
+        lines = dtrs
+    if kind != 'human':
+        refs, dtrerrors = core.parse_dtr_batch(lines, errors='filter')
+        errors += [(error.index, error.message) for error in dtrerrors
+                   if lines[error.index] is not None]
+    else:
+        if _parser is None:
+            _parser = Parser()
+        refs = []
+        for index, line in enumerate(lines):
+            try:
+                refs.append(_parser.parse(line))
+            except Exception as e:
+                refs.append(None)
+                errors.append((index, _error_message(e)))
+    values = []
+    for index, ref in enumerate(refs):
+        if ref is None:
+            values.append(None)
+            continue
+        try:
+            values.append(_convert(ref, output))
+        except Exception as e:
+            values.append(None)
+            errors.append((index, _error_message(e)))
+    return values, errors
+
+
+def _results(lineno, chunk):
+    """Yield BulkResults for CHUNK, a (values, errors) tuple whose first
+    line is LINENO."""
+    values, errors = chunk
+    errors = dict(errors)
+    for index, value in enumerate(values):
+        yield BulkResult(lineno + index, value, errors.get(index))
+
+
+def bulk_parse(lines, kind='dtr', output='ordinals', workers=None, chunksize=10000):
+    """Yield a BulkResult for each of LINES, in order.
+
+    KIND is 'dtr' for data type references like 'bible.62.4.9',
+    'human' for references like 'Mark 4:9' (see parse.py), or
+    'logosref' or 'reflyref' for references like
+    'logosref:Bible.Mk4.9' or 'https://ref.ly/logosref/Bible.Mk4.9'.
+    OUTPUT is one of OUTPUTS. WORKERS is the number of processes
+    (default: one per CPU): 0 parses in this process. LINES are sent
+    to workers CHUNKSIZE at a time, and only a few chunks per worker are in
+    flight, so memory use doesn't grow with the input.
+    """
+    assert kind in KINDS, f"Invalid kind: {kind}"
+    assert output in OUTPUTS, f"Invalid output: {output}"
+    assert chunksize > 0, f"Invalid chunksize: {chunksize}"
+    if workers is None:
+        workers = os.cpu_count() or 1
+    lines = iter(lines)
+    chunks = iter(lambda: list(islice(lines, chunksize)), [])
+    lineno = 1
+    if not workers:
+        for chunk in chunks:
+            yield from _results(lineno, _parse_chunk(kind, output, chunk))
+            lineno += len(chunk)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # futures in input order, at most two chunks per worker
+        pending = []
+        for chunk in chunks:
+            pending.append((len(chunk), executor.submit(_parse_chunk, kind, output, chunk)))
+            if len(pending) >= 2 * workers:
+                size, future = pending.pop(0)
+                yield from _results(lineno, future.result())
+                lineno += size
+        for size, future in pending:
+            yield from _results(lineno, future.result())
+            lineno += size
@@ -0,0 +1,118 @@
+"""Bounded caches for interning Bible reference objects.
+
+The factory functions in core.py (makeBibleref, makeRangeref, etc.)
+intern the objects they build, so the same reference string returns
+the same object. The original symbol table was a plain dict that never
+shrank: ReferenceCache bounds it with least-recently-used eviction.
+
+>>> from biblelib import cache, core
+>>> refcache = cache.ReferenceCache(maxsize=2)
+>>> oldcache = core.set_reference_cache(refcache)
+>>> core.makeBiblerefFromDTR('bible.62.4.9') is core.makeBiblerefFromDTR('bible.62.4.9')
+True
+>>> refcache.stats()
+CacheStats(hits=1, misses=1, evictions=0, size=1, maxsize=2)
+>>> refcache.resize(1000)  # evicting the oldest entries if it shrinks
+>>> refcache.clear()
+>>> core.set_reference_cache(oldcache) is refcache  # put the old one back
+True
+
+With weak=True, cached objects are held by weak references, and only
+the MAXSIZE most recently used objects are kept alive by the cache
+itself: anything still referenced elsewhere stays interned.
+
+"""
+
+from collections import namedtuple, OrderedDict
+import weakref
+
+
+CacheStats = namedtuple('CacheStats', ['hits', 'misses', 'evictions', 'size', 'maxsize'])
+
+
+class ReferenceCache(object):
+    """A mapping from keys (usually refids) to interned objects, with
+    LRU eviction once there are more than MAXSIZE entries.
+
+    If MAXSIZE is None, the cache is unbounded.
+    """
+    def __init__(self, maxsize=2**17, weak=False):
+        assert maxsize is None or maxsize >= 0, f"Invalid maxsize: {maxsize}"
+        self.maxsize = maxsize
+        self.weak = weak
+        # with weak, _refs holds every interned object and _lru only
+        # keeps the most recent ones alive
+        self._refs = weakref.WeakValueDictionary() if weak else None
+        self._lru = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __repr__(self):
+        return "<ReferenceCache: {} of {} entries>".format(len(self), self.maxsize)
+
+    def __len__(self):
+        return len(self._refs) if self.weak else len(self._lru)
+
+    def __contains__(self, key):
+        """True if KEY is cached. Doesn't affect stats or recency."""
+        return key in (self._refs if self.weak else self._lru)
+
+    def get(self, key, default=None):
+        """Return the object cached for KEY, or DEFAULT."""
+        obj = self._refs.get(key) if self.weak else self._lru.get(key)
+        if obj is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self._touch(key, obj)
+        return obj
+
+    def __getitem__(self, key):
+        obj = self.get(key)
+        if obj is None:
+            raise KeyError(key)
+        return obj
+
+    def __setitem__(self, key, obj):
+        if self.weak:
+            self._refs[key] = obj
+        self._touch(key, obj)
+
+    def _touch(self, key, obj):
+        """Mark KEY as most recently used, evicting as needed."""
+        if self.maxsize == 0:
+            if not self.weak:
+                self.evictions += 1
+            return
+        lru = self._lru
+        if key in lru:
+            lru.move_to_end(key)
+        else:
+            lru[key] = obj
+            self._evict()
+
+    def _evict(self):
+        while self.maxsize is not None and len(self._lru) > self.maxsize:
+            self._lru.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """Drop all entries. Stats are left alone."""
+        self._lru.clear()
+        if self.weak:
+            self._refs.clear()
+
+    def resize(self, maxsize):
+        """Change the maximum size, evicting the least recently used
+        entries if the cache is now too big."""
+        assert maxsize is None or maxsize >= 0, f"Invalid maxsize: {maxsize}"
+        self.maxsize = maxsize
+        self._evict()
+
+    def stats(self):
+        """Return a CacheStats namedtuple for this cache."""
+        return CacheStats(self.hits, self.misses, self.evictions, len(self), self.maxsize)
+
+    def reset_stats(self):
+        self.hits = self.misses = self.evictions = 0
@@ -0,0 +1,132 @@
+"""Convert streams of references between formats from the command line.
+
+$ echo 'bible.62.4.1-62.4.9' | biblelib --to userstring
+Mk 4:1–9
+$ biblelib --from human --to refid --format csv --column ref --output-column dtr refs.csv > out.csv
+$ biblelib --jobs 8 --errors ignore --stats refs.txt > converted.txt
+$ echo 'https://ref.ly/logosref/Bible.Mk4.1-9' | biblelib --from reflyref --to refid
+bible.62.4.1-62.4.9
+
+Input (a file, or stdin) is one reference per line, or a column of a
+CSV file (with a header) or a field of JSON lines. Output goes to
+stdout, in the same format. Lines are converted as they're read, so
+memory use doesn't depend on the size of the input.
+
+--errors mirrors makeBiblerefFromDTR(): 'strict' stops at the first
+bad reference, 'filter' outputs an empty value (null for JSON lines),
+and 'ignore' outputs the input unchanged.
+
+"""
+
+import argparse
+import csv
+from itertools import tee
+import json
+import sys
+import time
+
+from . import bulk
+
+
+FORMATS = ['lines', 'csv', 'jsonl']
+
+
+def _make_argparser():
+    argparser = argparse.ArgumentParser(
+        prog='biblelib', description='Convert Bible references between formats.')
+    argparser.add_argument('infile', nargs='?', type=argparse.FileType('r', encoding='utf-8'),
+                           default=sys.stdin, help='input file (default: stdin)')
+    argparser.add_argument('--from', dest='kind', choices=bulk.KINDS, default='dtr',
+                           help='input references: data type references, human-readable, logosref URIs '
+                                'or ref.ly URLs (default: dtr)')
+    argparser.add_argument('--to', dest='output', choices=bulk.OUTPUTS, default='userstring',
+                           help='output format (default: userstring)')
+    argparser.add_argument('--format', choices=FORMATS, default='lines',
+                           help='input and output file format (default: lines)')
+    argparser.add_argument('--column', default='ref',
+                           help='CSV column or JSON field with references (default: ref)')
+    argparser.add_argument('--output-column',
+                           help='CSV column or JSON field for results (default: replace --column)')
+    argparser.add_argument('--jobs', type=int, default=0,
+                           help='worker processes (default: 0, convert in this process)')
+    argparser.add_argument('--chunksize', type=int, default=10000,
+                           help='lines sent to a worker at a time (default: 10000)')
+    argparser.add_argument('--errors', choices=['strict', 'filter', 'ignore'], default='strict',
+                           help='what to do with bad references (default: strict)')
+    argparser.add_argument('--stats', action='store_true',
+                           help='print throughput and error counts to stderr')
+    return argparser
+
+
+def _text(value):
+    """Return VALUE as text for line or CSV output. """
+    if value is None:
+        return ''
+    return value if isinstance(value, str) else json.dumps(value)
+
+
+def _outputvalue(result, reference, errors):
+    """Return what to output for a BulkResult RESULT from REFERENCE."""
+    if result.error is None:
+        return result.value
+    if errors == 'strict':
+        raise SystemExit("biblelib: line {}: {}: {}".format(result.line, reference, result.error))
+    return reference if errors == 'ignore' else None
+
+
+def main(argv=None):
+    args = _make_argparser().parse_args(argv)
+    start = time.perf_counter()
+    outfile = sys.stdout
+    outcolumn = args.output_column or args.column
+    # RECORDS are lines, CSV rows or JSON objects: GETREF gets the
+    # reference from one, and WRITE outputs it with a converted value
+    if args.format == 'lines':
+        records = (line.rstrip('\n') for line in args.infile)
+
+        def getref(record):
+            return record
+
+        def write(record, value):
+            outfile.write(_text(value))
+            outfile.write('\n')
+    elif args.format == 'csv':
+        records = csv.DictReader(args.infile)
+        if args.column not in (records.fieldnames or []):
+            raise SystemExit("biblelib: no column {} in CSV input".format(args.column))
+        fieldnames = records.fieldnames + ([outcolumn] if outcolumn not in records.fieldnames else [])
+        writer = csv.DictWriter(outfile, fieldnames=fieldnames, lineterminator='\n')
+        writer.writeheader()
+
+        def getref(record):
+            return record[args.column]
+
+        def write(record, value):
+            record[outcolumn] = _text(value)
+            writer.writerow(record)
+    else:
+        records = (json.loads(line) for line in args.infile if line.strip())
+
+        def getref(record):
+            return record.get(args.column) or ''
+
+        def write(record, value):
+            record[outcolumn] = value
+            outfile.write(json.dumps(record, ensure_ascii=False))
+            outfile.write('\n')
+    # records waiting for results are buffered by tee: no more than
+    # bulk_parse() has in flight
+    records, refrecords = tee(records)
+    results = bulk.bulk_parse(map(getref, refrecords), kind=args.kind, output=args.output,
+                              workers=args.jobs, chunksize=args.chunksize)
+    nlines, nerrors = 0, 0
+    for record, result in zip(records, results):
+        nlines += 1
+        if result.error:
+            nerrors += 1
+        write(record, _outputvalue(result, getref(record), args.errors))
+    if args.stats:
+        seconds = time.perf_counter() - start
+        print("{} lines, {} errors in {:.2f}s ({:.0f} lines/s)".format(
+            nlines, nerrors, seconds, nlines / seconds if seconds else 0), file=sys.stderr)
+    return 0
@@ -19,6 +19,10 @@
 >>> groups.groupnames['Gospels'].n_verses
 3779
 
+# or only counting books in a canon
+>>> groups.groupnames['Apocrypha'].verse_count('Protestant')
+0
+
 # get a list of book + chapter
 >>> groups.groupnames['Pastoral Epistles'].get_book_chapters()
 ['1 Ti 1', '1 Ti 2', '1 Ti 3', '1 Ti 4', '1 Ti 5', '1 Ti 6', '2 Ti 1', '2 Ti 2',
@@ -28,7 +32,7 @@
 
 from collections import OrderedDict
 
-from .books import Book
+from .books import Book, count_verses
 
 
 # maps names to BookGroup instances
@@ -46,7 +50,11 @@ class BookGroup(object):
         self.name = name
         self.books = [Book(bookname) for bookname in booknames]
         self.n_chapters = sum(book.n_chapters for book in self.books)
-        self.n_verses = sum(book.n_verses for book in self.books)
+        # canon tradition (or None for all books) -> number of verses
+        self._verse_counts = {tradition: sum(count_verses(book.index, book.index, tradition)
+                                             for book in self.books)
+                              for tradition in [None] + self.canon_traditions}
+        self.n_verses = self._verse_counts[None]
         # TODO: maybe use parent groups instead?
         # assert isinstance(subgroups, list), 'Subgroups must be a list: {}'.format(subgroups)
         # self.subgroups = subgroups
@@ -92,6 +100,13 @@ class BookGroup(object):
                 canons.update([canon])
         return canons
 
+    def verse_count(self, canon_tradition=None):
+        """Return the number of verses in the group, only counting books
+        in CANON_TRADITION if given."""
+        assert canon_tradition in self._verse_counts, \
+          "Tradition '{}' must be one of {}".format(canon_tradition, self.canon_traditions)
+        return self._verse_counts[canon_tradition]
+
     def in_canon(self, tradition='Protestant'):
         assert tradition in self.canon_traditions, \
           "Tradition '{}' must be one of {}".format(tradition, self.canon_traditions)
@@ -0,0 +1,235 @@
+"""An index of records tagged with Bible references.
+
+Answers questions like "which records touch Mk 4:1-9" without
+scanning every record. References are indexed by their first and last
+ordinals (see books.py), kept in sorted arrays.
+
+>>> from biblelib import core, index
+>>> refindex = index.ReferenceIndex([(core.makeBiblerefFromDTR('bible.62.4.1-62.4.20'), 'doc1'),
+...                                  (core.makeBiblerefFromDTR('bible.62.4.3'), 'doc2'),
+...                                  (core.makeBiblerefFromDTR('bible.62.5'), 'doc3')])
+
+# records that share at least one verse
+>>> refindex.overlapping(core.makeBiblerefFromDTR('bible.62.4.1-62.4.9'))
+['doc1', 'doc2']
+
+# records whose references are within the query
+>>> refindex.contained(core.makeBiblerefFromDTR('bible.62.4'))
+['doc1', 'doc2']
+
+# records whose references include the query
+>>> refindex.containing(core.makeBiblerefFromDTR('bible.62.4.3'))
+['doc1', 'doc2']
+
+# records including a single verse, and just counting them
+>>> refindex.at(core.makeBiblerefFromDTR('bible.62.5.3'))
+['doc3']
+>>> refindex.overlapping(core.makeBiblerefFromDTR('bible.62'), count=True)
+3
+
+Each Bible datatype numbers its own ordinals (see versification.py),
+so don't mix datatypes in one index: map references to one datatype
+first, with to_bibletype(), or their ordinals with
+versification.map_ordinal() or map_ordinals(). Some books can't be
+mapped yet, like the Old Testament in bible+lxx.
+
+"""
+
+from bisect import bisect_left, bisect_right, insort
+from itertools import chain, count
+
+from .core import GenericBibleref
+
+
+def _bucket(span):
+    """Return the bucket for records spanning SPAN ordinals past their
+    first: 0 for spans up to 63, then k for spans from 8**(k+1) to
+    8**(k+2) - 1."""
+    return max(0, span.bit_length() - 4) // 3
+
+
+class _Bucket(object):
+    """Records of similar span, ordered by first ordinal."""
+    __slots__ = ('records', 'firsts', 'maxspan', 'minspan')
+
+    def __init__(self):
+        # (first, last, seq, ref, value): the unique sequence number
+        # means references and values are never compared, so they sort
+        # by first and last ordinal, then when they were added
+        self.records = []
+        # first ordinals, parallel to records
+        self.firsts = []
+        # the longest and shortest (last - first) in the bucket: bound
+        # the search window
+        self.maxspan = 0
+        self.minspan = None
+
+    def add(self, record, position=None):
+        """Add RECORD at POSITION in records, or at the end."""
+        if position is None:
+            self.records.append(record)
+            self.firsts.append(record[0])
+        else:
+            self.records.insert(position, record)
+            self.firsts.insert(position, record[0])
+        span = record[1] - record[0]
+        self.maxspan = max(self.maxspan, span)
+        self.minspan = span if self.minspan is None else min(self.minspan, span)
+
+    def window(self, lo, hi):
+        """Return the records whose first ordinal is from LO to HI."""
+        return self.records[bisect_left(self.firsts, lo):bisect_right(self.firsts, hi)]
+
+
+class ReferenceIndex(object):
+    """Records (a reference and a value) indexed by the reference's
+    first and last ordinals.
+
+    Query results come back ordered by first ordinal. Records are
+    bucketed by span, in powers of eight, and each bucket is kept
+    ordered by first ordinal: a query only looks at records whose first
+    ordinal is within the longest span in their bucket of the query, so
+    a few long records (like whole books) don't slow down queries about
+    short ones. Overlap and point counts are O(log n).
+    """
+    def __init__(self, records=()):
+        """RECORDS is an iterable of (reference, value) pairs. """
+        # _bucket(span) -> _Bucket
+        self._buckets = {}
+        # first and last ordinals of all records, each sorted, for counts
+        self._firsts = []
+        self._lasts = []
+        self._seq = count()
+        if records:
+            self.build(records)
+
+    def __repr__(self):
+        return "<ReferenceIndex: {} records>".format(len(self))
+
+    def __len__(self):
+        return len(self._firsts)
+
+    def __iter__(self):
+        """Iterate over (reference, value) pairs in order. """
+        records = sorted(chain.from_iterable(bucket.records for bucket in self._buckets.values()))
+        return ((record[3], record[4]) for record in records)
+
+    def _get_bucket(self, span):
+        """Return the bucket for records spanning SPAN, adding it if
+        need be."""
+        bucket = self._buckets.get(_bucket(span))
+        if bucket is None:
+            bucket = self._buckets[_bucket(span)] = _Bucket()
+        return bucket
+
+    def build(self, records):
+        """Add (reference, value) pairs in RECORDS, sorting just once.
+        Faster than repeated insert() for bulk loading."""
+        for ref, value in records:
+            first, last = ref.ordinals
+            self._get_bucket(last - first).add((first, last, next(self._seq), ref, value))
+        for bucket in self._buckets.values():
+            bucket.records.sort()
+            bucket.firsts = [record[0] for record in bucket.records]
+        self._firsts = sorted(first for bucket in self._buckets.values() for first in bucket.firsts)
+        self._lasts = sorted(record[1] for bucket in self._buckets.values() for record in bucket.records)
+
+    def insert(self, ref, value):
+        """Add a record for REF and VALUE."""
+        first, last = ref.ordinals
+        record = (first, last, next(self._seq), ref, value)
+        bucket = self._get_bucket(last - first)
+        bucket.add(record, bisect_right(bucket.records, record))
+        insort(self._firsts, first)
+        insort(self._lasts, last)
+
+    def delete(self, ref, value):
+        """Remove one record for REF and VALUE. Raise KeyError if there
+        isn't one."""
+        first, last = ref.ordinals
+        key = _bucket(last - first)
+        bucket = self._buckets.get(key)
+        if bucket is not None:
+            records = bucket.records
+            for i in range(bisect_left(bucket.firsts, first), bisect_right(bucket.firsts, first)):
+                record = records[i]
+                if record[1] == last and record[3] == ref and record[4] == value:
+                    del records[i]
+                    del bucket.firsts[i]
+                    if not records:
+                        del self._buckets[key]
+                    elif last - first in (bucket.maxspan, bucket.minspan):
+                        # recompute the bounds
+                        spans = [record[1] - record[0] for record in records]
+                        bucket.maxspan, bucket.minspan = max(spans), min(spans)
+                    del self._firsts[bisect_left(self._firsts, first)]
+                    del self._lasts[bisect_left(self._lasts, last)]
+                    return
+        raise KeyError("No record for {} and {}".format(ref, value))
+
+    @staticmethod
+    def _results(selections, count):
+        """Return the values of the records in SELECTIONS, lists of
+        records, in order, or with COUNT the number of them."""
+        if count:
+            return sum(map(len, selections))
+        selections = [selection for selection in selections if selection]
+        if len(selections) == 1:
+            return [record[4] for record in selections[0]]
+        return [record[4] for record in sorted(chain.from_iterable(selections))]
+
+    def overlapping(self, ref, count=False):
+        """Return the values of records sharing at least one verse with
+        REF, or just the number of them with COUNT."""
+        qfirst, qlast = ref.ordinals
+        if count:
+            # everything, less records that end before or start after REF
+            return bisect_right(self._firsts, qlast) - bisect_left(self._lasts, qfirst)
+        return self._results([[record for record in bucket.window(qfirst - bucket.maxspan, qlast)
+                               if record[1] >= qfirst]
+                              for bucket in self._buckets.values()], count)
+
+    def contained(self, ref, count=False):
+        """Return the values of records whose references are within REF,
+        or just the number of them with COUNT."""
+        qfirst, qlast = ref.ordinals
+        # longer records can't be within REF
+        buckets = [bucket for bucket in self._buckets.values() if bucket.minspan <= qlast - qfirst]
+        if count:
+            total = 0
+            for bucket in buckets:
+                i = bisect_left(bucket.firsts, qfirst)
+                # records starting by SURE end within REF, however long
+                sure = qlast - bucket.maxspan
+                if sure >= qfirst:
+                    j = bisect_right(bucket.firsts, sure)
+                    total += j - i
+                    i = j
+                records = bucket.records
+                total += sum(1 for n in range(i, bisect_right(bucket.firsts, qlast))
+                             if records[n][1] <= qlast)
+            return total
+        return self._results([[record for record in bucket.window(qfirst, qlast)
+                               if record[1] <= qlast]
+                              for bucket in buckets], count)
+
+    def containing(self, ref, count=False):
+        """Return the values of records whose references include all of
+        REF, or just the number of them with COUNT."""
+        qfirst, qlast = ref.ordinals
+        # shorter records can't include REF
+        buckets = [bucket for bucket in self._buckets.values() if bucket.maxspan >= qlast - qfirst]
+        return self._results([[record for record in bucket.window(qlast - bucket.maxspan, qfirst)
+                               if record[1] >= qlast]
+                              for bucket in buckets], count)
+
+    def at(self, verse, count=False):
+        """Return the values of records including VERSE (a Verseref or
+        an ordinal), or just the number of them with COUNT."""
+        ordinal = verse.ordinal if isinstance(verse, GenericBibleref) else verse
+        if count:
+            # records starting by VERSE, less those that end before it
+            return bisect_right(self._firsts, ordinal) - bisect_left(self._lasts, ordinal)
+        return self._results([[record for record in bucket.window(ordinal - bucket.maxspan, ordinal)
+                               if record[1] >= ordinal]
+                              for bucket in self._buckets.values()], count)
@@ -13,6 +13,13 @@ data)
 
 >>> from biblelib.reference import parse
 
+Book names can be in any of the languages in biblebooks.py:
+
+>>> parse.Parser(language='de').parse('Mk 4,1-9')
+RangeVerseref('bible.62.4.1-62.4.9')
+>>> parse.Parser(language='zh-Hans').parse('可4:9')
+Verseref('bible.62.4.9')
+
 This doesn't handle:
 
 * references to single-chapter books with an elided chapter, like
@@ -23,10 +30,133 @@ This doesn't handle:
 import re
 
 
+from .biblebooks import LANGUAGES, book_labels
 from .books import Book, get_all_booknames
+from .cache import ReferenceCache
 from . import core
 
 
+# parse() ignores periods, and treats all dashes alike
+_NORMALIZE_TABLE = str.maketrans({'.': None, '‐': '-', '–': '-', '—': '-', '：': ':'})
+# languages that separate chapter and verse with a comma, like 'Mk 4,9'
+_COMMA_LANGUAGES = ['de', 'es', 'pt']
+_NORMALIZE_TABLE_COMMA = {**_NORMALIZE_TABLE, **str.maketrans({',': ':'})}
+# languages whose book names may run into the chapter, like '可4:9'
+_UNSPACED_LANGUAGES = ['ko', 'zh-Hans', 'zh-Hant']
+# a number run into the rest of a book name, like the 1 in '1Sa'
+_NUMBER_PREFIX_REGEXP = re.compile(r'^(\d+)(?=\S)')
+
+
+def normalize(string, language='en'):
+    """Return STRING cleaned up for parsing: without periods, with
+    dashes made hyphens, and runs of whitespace made single spaces.
+    For languages in _COMMA_LANGUAGES, commas are made colons."""
+    table = _NORMALIZE_TABLE_COMMA if language in _COMMA_LANGUAGES else _NORMALIZE_TABLE
+    return ' '.join(string.translate(table).split())
+
+
+def _booknames(language='en'):
+    """Return a list of (name, book object) tuples for LANGUAGE: the
+    abbreviations in biblebooks.py, and for English all the names in
+    books.py too. Other languages also have their abbreviations without
+    any spaces, and with a space after a leading number, like '1 Sa'
+    for '1Sa'."""
+    names = []
+    for index, label in enumerate(book_labels(language)[1:], start=1):
+        book = Book(index)
+        names.append((label, book))
+        if language != 'en':
+            if ' ' in label:
+                names.append((label.replace(' ', ''), book))
+            elif _NUMBER_PREFIX_REGEXP.match(label):
+                names.append((_NUMBER_PREFIX_REGEXP.sub(r'\1 ', label), book))
+    if language == 'en':
+        names.extend((name, Book(name)) for name in get_all_booknames())
+    return names
+
+
+def _make_bookname_trie(ignorecase=False, reverse=False, language='en'):
+    """Return a trie of book names in LANGUAGE: nested dicts keyed by
+    character, with the book object under '' where a name ends. With
+    IGNORECASE, names are case-folded. With REVERSE, names are spelled
+    backwards, for matching a name that ends at a known position."""
+    trie = {}
+    for name, book in _booknames(language):
+        key = name.casefold() if ignorecase else name
+        node = trie
+        for char in (reversed(key) if reverse else key):
+            node = node.setdefault(char, {})
+        node[''] = book
+    return trie
+
+
+# built once and shared by all parsers: (language, ignorecase) -> trie
+_BOOKNAME_TRIE = _make_bookname_trie()
+_BOOKNAME_TRIE_I = _make_bookname_trie(ignorecase=True)
+_BOOKNAME_TRIES = {('en', False): _BOOKNAME_TRIE, ('en', True): _BOOKNAME_TRIE_I}
+
+
+def _bookname_trie(language='en', ignorecase=False):
+    """Return the shared trie for LANGUAGE, building it the first time."""
+    trie = _BOOKNAME_TRIES.get((language, ignorecase))
+    if trie is None:
+        assert language in LANGUAGES, f"Invalid language: {language}"
+        trie = _BOOKNAME_TRIES[(language, ignorecase)] = _make_bookname_trie(
+            ignorecase=ignorecase, language=language)
+    return trie
+
+
+def match_bookname(string, ignorecase=False, language='en'):
+    """Return a tuple of book object and remaining string for the
+    longest book name in LANGUAGE at the start of STRING that's
+    followed by a space and something more, or None. For languages in
+    _UNSPACED_LANGUAGES, the name may also be followed directly by a
+    digit.
+
+    Runs in time linear in the length of the name, however many names
+    there are.
+    """
+    trie = _bookname_trie(language, ignorecase)
+    unspaced = language in _UNSPACED_LANGUAGES
+    if ignorecase:
+        folded = string.casefold()
+        # folding rarely changes the length, but offsets have to match
+        if len(folded) == len(string):
+            book, rest = _walk_bookname_trie(trie, folded, unspaced=unspaced)
+        else:
+            book, rest = _walk_bookname_trie(trie, string, fold=True, unspaced=unspaced)
+    else:
+        book, rest = _walk_bookname_trie(trie, string, unspaced=unspaced)
+    if book is None or rest == len(string):
+        return None
+    return book, string[rest:]
+
+
+def _walk_bookname_trie(node, string, fold=False, unspaced=False):
+    """Return the book for the longest name in trie NODE at the start
+    of STRING that's followed by a space, and the offset of what comes
+    after the space, or (None, 0). With FOLD, case-fold each character
+    along the way. With UNSPACED, a name may be followed by a digit
+    instead of a space."""
+    book, rest = None, 0
+    for i, char in enumerate(string):
+        if '' in node:
+            if char == ' ':
+                book, rest = node[''], i + 1
+            elif unspaced and char.isdigit():
+                book, rest = node[''], i
+        if fold:
+            for char in char.casefold():
+                node = node.get(char)
+                if node is None:
+                    return book, rest
+        else:
+            node = node.get(char)
+            if node is None:
+                return book, rest
+    return book, rest
+
+
 class ReferenceParserError(Exception):
 #class ReferenceParserError(reference.ReferenceError):
     """Something bad happened in parsing a reference."""
@@ -42,10 +172,6 @@ class Parser(object):
     bibletype_regexp = re.compile(_bibletype_regexp_template.format(_bibletype_keys))
     # case-insensitive version
     bibletype_regexp_i = re.compile(_bibletype_regexp_template.format(_bibletype_keys), re.I)
-    # matching bible book names
-    _biblebook_regexp_template = '(?P<biblebook>{}) (?P<ref>.+)'
-    _biblebook_keys = '|'.join(get_all_booknames())
-    biblebook_regexp = re.compile(_biblebook_regexp_template.format(_biblebook_keys))
     _verseref_regexp_template = r"(?P<chapter>\d+):(?P<verse>\d+)"
     verseref_regexp = re.compile(_verseref_regexp_template)
     chapterref_regexp = re.compile(r"(?P<chapter>\d+)")
@@ -53,47 +179,61 @@ class Parser(object):
     rangeverseref_regexp = re.compile(r"{}[-|–](?P<endverse>\d+)".format(_verseref_regexp_template))
     rangechapterverseref_regexp = re.compile(r"{}[-|–](?P<endchapter>\d+):(?P<endverse>\d+)".format(_verseref_regexp_template))
 
-    def __init__(self):
-        pass
+    def __init__(self, cachesize=2**16, language='en'):
+        """Parsed references are memoized for the CACHESIZE most
+        recently parsed (normalized) strings: 0 turns this off, and None
+        makes it unbounded.
+
+        Book names are in LANGUAGE, one of biblebooks.LANGUAGES: the
+        abbreviations in biblebooks.py, and for English any of the names
+        in books.py too.
+        """
+        assert language in LANGUAGES, f"Invalid language: {language}"
+        self.language = language
+        # build the name index now rather than on the first parse
+        _bookname_trie(language)
+        self._memo = ReferenceCache(maxsize=cachesize)
+
+    def cache_stats(self):
+        """Return a CacheStats namedtuple for the parse memo. """
+        return self._memo.stats()
+
+    def clear_cache(self):
+        """Empty the parse memo and reset its stats. """
+        self._memo.clear()
+        self._memo.reset_stats()
 
     def parse(self, string):
+        """Return a reference object for STRING, a human-readable
+        reference like 'Mark 4:1-9'. Raise ReferenceParserError if it
+        can't be parsed.
+
+        The same reference always returns the same (interned) object.
+        """
         # strip periods and other cruft
-        string = string.replace('.', '').strip()
-        string = re.sub(r"‐|–|—", "-", string)
+        string = normalize(string, self.language)
+        ref = self._memo.get(string)
+        if ref is None:
+            ref = self._memo[string] = self._parse(string)
+        return ref
+
+    def _parse(self, string):
         bibletype, rest = self.parse_bibletype(string)
         book, rest = self.parse_bookname(rest)
         parseargs = {'bibletype': bibletype or 'bible',
                      'book': book.index,
                      }
-        if self.verseref_regexp.fullmatch(rest):
-            verseref_match = self.verseref_regexp.fullmatch(rest)
-            parseargs.update(chapter=verseref_match.group('chapter'),
-                             verse=verseref_match.group('verse'))
-            return make_verseref(**parseargs)
-        elif self.rangeverseref_regexp.fullmatch(rest):
-            rangeverseref_match = self.rangeverseref_regexp.fullmatch(rest)
-            parseargs.update(chapter=rangeverseref_match.group('chapter'),
-                             verse=rangeverseref_match.group('verse'),
-                             endverse=rangeverseref_match.group('endverse'))
-            return make_rangeverseref(**parseargs)
-        elif self.rangechapterverseref_regexp.fullmatch(rest):
-            rangechapterverseref_match = self.rangechapterverseref_regexp.fullmatch(rest)
-            parseargs.update(chapter=rangechapterverseref_match.group('chapter'),
-                             verse=rangechapterverseref_match.group('verse'),
-                             endchapter=rangechapterverseref_match.group('endchapter'),
-                             endverse=rangechapterverseref_match.group('endverse'))
-            return make_rangechapterverseref(**parseargs)
-        elif self.rangechapterref_regexp.fullmatch(rest):
-            rangechapterref_match = self.rangechapterref_regexp.fullmatch(rest)
-            parseargs.update(chapter=rangechapterref_match.group('chapter'),
-                             endchapter=rangechapterref_match.group('endchapter'))
-            return make_rangechapterref(**parseargs)
-        elif self.chapterref_regexp.fullmatch(rest):
-            chapterref_match = self.chapterref_regexp.fullmatch(rest)
-            parseargs.update(chapter=chapterref_match.group('chapter'))
-            return make_chapterref(**parseargs)
-        else:
-            raise ReferenceParserError(f"Unable to parse: {string}")
+        # match each pattern once, in order
+        for regexp, make in [(self.verseref_regexp, make_verseref),
+                             (self.rangeverseref_regexp, make_rangeverseref),
+                             (self.rangechapterverseref_regexp, make_rangechapterverseref),
+                             (self.rangechapterref_regexp, make_rangechapterref),
+                             (self.chapterref_regexp, make_chapterref)]:
+            m = regexp.fullmatch(rest)
+            if m:
+                parseargs.update(m.groupdict())
+                return make(**parseargs)
+        raise ReferenceParserError(f"Unable to parse: {string}")
         
     def parse_bibletype(self, string, ignorecase=False):
         """Return tuple of bibletype and reference.
@@ -113,11 +253,9 @@ class Parser(object):
 
         Raise BiblerefParserError if no bookname.
         """
-        # BUG: fails on space in '1 Sam 24:5'
-        m = self.biblebook_regexp.fullmatch(string)
+        m = match_bookname(string, ignorecase=ignorecase, language=self.language)
         if m:
-            book, rest = (Book(m.group('biblebook')), m.group('ref'))
-            return self.handle_one_chapter_book(book, rest)
+            return self.handle_one_chapter_book(*m)
         else:
             raise ReferenceParserError(f"No book name found: {string}")
 
@@ -128,22 +266,22 @@ class Parser(object):
 
         
 def make_rangechapterref(chapter, endchapter, *args, **kwargs):
-    start = core.Chapterref(chapter=chapter, *args, **kwargs)
-    end = core.Chapterref(chapter=endchapter, *args, **kwargs)
-    return core.RangeChapterref(start, end)
+    start = core.makeBibleref(chapter=chapter, *args, **kwargs)
+    end = core.makeBibleref(chapter=endchapter, *args, **kwargs)
+    return core.makeRangeref(start, end)
 
 def make_rangeverseref(verse, endverse, *args, **kwargs):
-    start = core.Verseref(verse=verse, *args, **kwargs)
-    end = core.Verseref(verse=endverse, *args, **kwargs)
-    return core.RangeVerseref(start, end)
+    start = core.makeBibleref(verse=verse, *args, **kwargs)
+    end = core.makeBibleref(verse=endverse, *args, **kwargs)
+    return core.makeRangeref(start, end)
 
 def make_rangechapterverseref(chapter, verse, endchapter, endverse, *args, **kwargs):
-    start = core.Verseref(chapter=chapter, verse=verse, *args, **kwargs)
-    end = core.Verseref(chapter=endchapter, verse=endverse, *args, **kwargs)
-    return core.RangeVerseref(start, end)
+    start = core.makeBibleref(chapter=chapter, verse=verse, *args, **kwargs)
+    end = core.makeBibleref(chapter=endchapter, verse=endverse, *args, **kwargs)
+    return core.makeRangeref(start, end)
 
 def make_chapterref(*args, **kwargs):
-    return core.Chapterref(*args, **kwargs)
+    return core.makeBibleref(*args, **kwargs)
 
 def make_verseref(*args, **kwargs):
-    return core.Verseref(*args, **kwargs)
+    return core.makeBibleref(*args, **kwargs)
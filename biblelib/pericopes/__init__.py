@@ -5,4 +5,4 @@ This is a generalized set of passage units and titles, derived from comparing pe
 
 """
 
-from .pericopes import Pericope
+from .pericopes import Pericope, PericopeSet
@@ -1,46 +1,53 @@
 """
 Reader for and interface to Logos in-house pericope sets
 
->>> ps = pericope.PericopeSet()
+>>> from biblelib.pericopes import PericopeSet
+>>> ps = PericopeSet()
 # read the data
 # currently some issue here with the ParagraphPericopes, which include deuterocanon
 # PericopesForSearch.xml works though
 >>> ps.read(file='/Users/sboisen/git/CI/ShipPericopes/legacy/ParagraphPericopesForSearch.xml')
 >>> ps.start
-Pericope('Ge 1:1-5', 'Paragraph 1')
+Pericope('Ge 1:1–5', 'Paragraph 1')
 >>> ps.start.next
-Pericope('Ge 1:6-8', 'Paragraph 2')
+Pericope('Ge 1:6–8', 'Paragraph 2')
 # find the pericopes for a reference
->>> from libronix import bibleref
->>> bref = bibleref.makeBiblerefFromDTR('bible.1.50.20-1.50.22')
+>>> from biblelib import core
+>>> bref = core.makeBiblerefFromDTR('bible.1.50.20-1.50.22')
 >>> ps.find(bref)
-[Pericope('Ge 50:15-21', 'Paragraph 284'), Pericope('Ge 50:22-23', 'Paragraph 285')]
-# write out as treemap data
->>> ps.write_as_treemap(outstr=open('/Users/sboisen/tmp/pericope_treemap.txt', 'w'))
-# write out as UMd HCIL treemap data
->>> ps.write_as_umd_treemap(outstr=open('/Users/sboisen/tmp/pericope_treemap.tm3', 'w'))
-
-This whole thing needs a rewrite
-- use iterables
-- make it more general
+[Pericope('Ge 50:15–21', 'Paragraph 284'), Pericope('Ge 50:22–23', 'Paragraph 285')]
+# write out as JSON
+>>> ps.write_as_json(outstr=open('/Users/sboisen/tmp/pericopes.json', 'w'))
+
+Everything is local: each book has an array mapping verse indices (see
+books.py) to positions in the sequence of pericopes, so find() is two
+array lookups and a slice.
+
+To start up quickly, save a binary snapshot once, and load that
+instead of the XML:
+
+>>> ps.save_snapshot('pericopes.snapshot')
+>>> ps = PericopeSet.load_snapshot('pericopes.snapshot')
 """
 
-import os
+from array import array
 import json
+import mmap
+import os
+import struct
+import sys
 
 from lxml import etree
 from pathlib import Path
 
-# old-school
-# should move to new style
-from libronix import bibleref
-# new-style
-from logos_pyutil.clients.ReferenceUtility import ReferenceUtility as ru
+from .. import core
+from ..books import Book, get_ordinal_bcv
 
-from libronix.biblebooks import bible
-from libronix.visualization import Treemap
 
-_REFERENCE_CACHE = {}
+# binary snapshots: see PericopeSet.save_snapshot()
+_SNAPSHOT_MAGIC = b'BLPS'
+_SNAPSHOT_VERSION = 2
+_SNAPSHOT_HEADER = struct.Struct('<4sIIII')
 
 
 class Pericope(object):
@@ -48,57 +55,116 @@ class Pericope(object):
     """
     def __init__(self, ref, title):
         """Create a Pericope instance given
-        - ref: a Libronix-style range like bible.1.1.1-1.1.13
+        - ref: a range like bible.1.1.1-1.1.13, or a reference object
         - title: a string
         """
         assert ref, 'must provide ref'
         # bibleref object (RangeVerseref or Verseref)
-        self.ref = bibleref.makeBiblerefFromDTR(ref)
-        self.bookname = unicode(self.ref.GetBookname())
-        self.book = bible.BookForName(self.bookname)
+        self.ref = ref if isinstance(ref, core.GenericBibleref) else core.makeBiblerefFromDTR(ref)
+        self.book = Book(self.ref.book)
+        self.bookname = self.book.get_bookname()
         assert title, 'must provide title'
-        self.title = unicode(title)
-        # need a method to set next/previous
-        # for tracking pericope sequence: only defined within a book
-        # self.bookindex = None
-        # self.next = None
-        # self.previous = None
-
-    # this encoding foo is probably the wrong approach
+        self.title = str(title)
+        # set by PericopeSet: position within the book and the whole
+        # set, and the sequence of pericopes in the set
+        self.bookindex = None
+        self.index = None
+        self._sequence = None
+
     def __repr__(self):
-        return "{}('{}', '{}')".format(type(self).__name__, self.ref.ldlsref().encode('utf-8'),
-                                   self.title.encode('utf-8'))
+        return "{}('{}', '{}')".format(type(self).__name__, self.label, self.title)
 
-    def __unicode__(self):
-        return u"%s('%s', '%s')" % (type(self).__name__, self.ref.ldlsref(),
-                                   self.title)
+    @property
+    def label(self):
+        """A human-readable reference, or the refid for books without
+        abbreviations."""
+        try:
+            return self.ref.userstring()
+        except AssertionError:
+            return self.ref.refid
+
+    @property
+    def previous(self):
+        """The pericope before this one in its set, or None."""
+        if self._sequence is None or self.index == 0:
+            return None
+        return self._sequence[self.index - 1]
 
     @property
-    def start(self): return self.ref.start
-        
+    def next(self):
+        """The pericope after this one in its set, or None."""
+        if self._sequence is None or self.index == len(self._sequence) - 1:
+            return None
+        return self._sequence[self.index + 1]
+
+    @property
+    def start(self):
+        return self.ref.start
+
     @property
-    def end(self): return self.ref.end
+    def end(self):
+        return self.ref.end
 
-    def set_sequence(self):
-        pass
-        
     def to_dict(self):
         """Return a dict of values to convert a Pericope to a Treemap.Mappable.
         """
-        return {'id': unicode(self.ref.id),
-                'label': unicode(self.ref.ldlsref()),
+        return {'id': self.ref.refid,
+                'label': self.label,
                 'size': len(self.ref),
                 'bookindex': self.bookindex,
                 'bookname': self.bookname,
                 'title': self.title,
-                'previous': unicode(self.previous.ref.id) if self.previous else None,
-                'next': unicode(self.next.ref.id) if self.next else None,
+                'previous': self.previous.ref.refid if self.previous else None,
+                'next': self.next.ref.refid if self.next else None,
                 }
-# removed code from libronix.data related to treemaps
+
+
+class _SnapshotPericopes(object):
+    """The sequence of pericopes in a snapshot, built the first time
+    each is used: a list-like wrapper around TABLE (offsets into the
+    string table, four per pericope) and STRINGS, both views of the
+    snapshot. BUILD(ref, title, index) makes a pericope. Pericopes
+    added later are appended as usual.
+    """
+    def __init__(self, table, strings, build):
+        self._table = table
+        self._strings = strings
+        self._build = build
+        self._pericopes = [None] * (len(table) // 4)
+
+    def __len__(self):
+        return len(self._pericopes)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        pericope = self._pericopes[index]
+        if pericope is None:
+            refoffset, reflength, titleoffset, titlelength = self._table[4 * index:4 * index + 4]
+            strings = self._strings
+            pericope = self._pericopes[index] = self._build(
+                str(strings[refoffset:refoffset + reflength], 'utf-8'),
+                str(strings[titleoffset:titleoffset + titlelength], 'utf-8'),
+                index)
+        return pericope
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def append(self, pericope):
+        self._pericopes.append(pericope)
 
 
 class PericopeSet(dict):
-    """Models a complete set of pericopes. 
+    """Models a complete set of pericopes: a dict from references to
+    pericopes, which are also kept in order in self.pericopes.
+
+    Only references that start a pericope are keys. Sets loaded from a
+    snapshot build each pericope the first time it's used, so looking
+    one up goes through the verse index rather than the dict.
     """
     # YMMV
     userhomedir = Path(os.path.expanduser('~'))
@@ -110,97 +176,234 @@ class PericopeSet(dict):
         """
         dict.__init__(self)
         self.pericopeclass = pericopeclass
-        # VerseRef -> Pericope
-        # ToDo: use an OrderedDict and toss all this next/previous stuff, add an index within book
-        
-        self._pericopes = {}
-        # first pericope of them all
-        self.start = None
-        # book -> first pericope, for all books
-        self.book_starts = {}
-
-    # ToDo: this is really slow with the API hits. Maybe go back to bibleref? 
-    
-    # the version that justs hashes every verse index to a pericope
-    # that contains it
+        # all the pericopes, in order
+        self.pericopes = []
+        # book index -> array of positions in self.pericopes for each
+        # verse index, or -1 for verses without a pericope
+        self._verseindex = {}
+        # book name -> position of its first pericope
+        self._bookstarts = {}
+
+    @property
+    def start(self):
+        """The first pericope of them all, or None."""
+        return self.pericopes[0] if self.pericopes else None
+
+    @property
+    def book_starts(self):
+        """A dict of book name -> first pericope, for all books."""
+        return {bookname: self.pericopes[index] for bookname, index in self._bookstarts.items()}
+
+    # the dict is filled in as pericopes are looked up
+    def __missing__(self, ref):
+        if isinstance(ref, core.GenericBibleref) and ref.bibletype == 'bible':
+            index = self._lookup(ref.ordinals[0])
+            if index >= 0:
+                pericope = self.pericopes[index]
+                if pericope.ref == ref:
+                    dict.__setitem__(self, ref, pericope)
+                    return pericope
+        raise KeyError(ref)
+
+    def __contains__(self, ref):
+        try:
+            self[ref]
+        except KeyError:
+            return False
+        return True
+
+    def get(self, ref, default=None):
+        try:
+            return self[ref]
+        except KeyError:
+            return default
+
+    def __len__(self):
+        return len(self.pericopes)
+
+    def __iter__(self):
+        return (pericope.ref for pericope in self.pericopes)
+
+    def keys(self):
+        return list(self)
+
+    def values(self):
+        return list(self.pericopes)
+
+    def items(self):
+        return [(pericope.ref, pericope) for pericope in self.pericopes]
+
     def read(self, pdir=None, file='PericopesForSearch.xml'):
+        """Read pericopes from FILE in PDIR: they must be in canonical
+        order.
+
+        The file is streamed, and each pericope element discarded once
+        it's added, so memory doesn't grow with the size of the file
+        (beyond the pericopes themselves).
+        """
         if pdir:
             self.pdir = pdir
         self.path = os.path.join(self.pdir, file)
-        pstr = etree.parse(open(self.path))
-        lastp = None
-        lastbook = None
-        # assumption is that we're reading them in canonical order
-        for el in pstr.xpath('/pericopes/*'):
-            newp = self.pericopeclass(ref=el.xpath('string(@ref)'),
-                            title=el.xpath('string(title)'))
-            newbook = newp.bookname
-            # this assumes the pericopes are read in order
-            if not self.start:
-                self.start = newp
-            if newbook != lastbook:
-                self.book_starts[newbook] = newp
-                bookindex = 0
-                lastbook = newbook
-            else:
-                bookindex += 1
-            newp.bookindex = bookindex
-            self[newp.ref] = newp
-            start = newp.start
-            end = newp.end
-            # for vr in newp.ref.EnumerateVerses():
-            #     self._pericopes[vr] = newp
-            # cache results for development: API is slow
-            if newp.ref not in _REFERENCE_CACHE:
-                _REFERENCE_CACHE[newp.ref] = list(ru.enumerate_verses(newp.ref))
-            for vr in _REFERENCE_CACHE[newp.ref]:
-                self._pericopes[vr] = newp
-            # add sequence information
-            if lastp:
-                newp.previous = lastp
-                lastp.next = newp
-            lastp = newp
+        depth = 0
+        for event, el in etree.iterparse(self.path, events=('start', 'end')):
+            if event == 'start':
+                depth += 1
+                continue
+            depth -= 1
+            # children of the root are pericopes
+            if depth == 1:
+                title = el.find('title')
+                self.add(el.get('ref'), '' if title is None else ''.join(title.itertext()))
+                # free the element and any earlier siblings
+                el.clear()
+                while el.getprevious() is not None:
+                    del el.getparent()[0]
+
+    def add(self, ref, title):
+        """Add a pericope for REF (a reference or a data type
+        reference string) and TITLE after any others, returning it."""
+        newp = self.pericopeclass(ref=ref, title=title)
+        lastp = self.pericopes[-1] if self.pericopes else None
+        assert not lastp or lastp.ref.ordinals < newp.ref.ordinals, \
+            'Pericopes must be added in order: {} after {}'.format(newp, lastp)
+        self._append(newp)
+        # the ordinals of a pericope are within its book
+        verses = self._verseindex.get(newp.book.index)
+        if verses is None:
+            verses = array('i', [-1]) * newp.book.n_verses
+        elif not isinstance(verses, array):
+            # read-only, from a snapshot
+            verses = array('i', verses)
+        self._verseindex[newp.book.index] = verses
+        first, last = newp.ref.ordinals
+        offset = newp.book.ordinal_offset
+        verses[first - offset:last - offset + 1] = array('i', [newp.index]) * (last - first + 1)
+        return newp
+
+    def _append(self, newp):
+        """Add NEWP to the sequence of pericopes, without indexing its
+        verses."""
+        index = len(self.pericopes)
+        if not index or newp.bookname != self.pericopes[-1].bookname:
+            self._bookstarts[newp.bookname] = index
+        self._place(newp, index)
+        self.pericopes.append(newp)
+        self[newp.ref] = newp
+
+    def _place(self, pericope, index):
+        """Set the position of PERICOPE, at INDEX in the sequence."""
+        pericope.index = index
+        pericope.bookindex = index - self._bookstarts[pericope.bookname]
+        pericope._sequence = self.pericopes
+
+    def _build(self, ref, title, index):
+        """Return a new pericope for REF and TITLE at INDEX, which is
+        already in the sequence."""
+        pericope = self.pericopeclass(ref=ref, title=title)
+        self._place(pericope, index)
+        return pericope
+
+    def _lookup(self, ordinal):
+        """Return the position of the pericope including ORDINAL, or -1."""
+        book = get_ordinal_bcv(ordinal)[0]
+        verses = self._verseindex.get(book)
+        if verses is None:
+            return -1
+        return verses[ordinal - Book(book).ordinal_offset]
 
     def find(self, bref):
-        """Return the list of pericopes that span BREF, a VerseRef or
-        RangeVerseref. Raise an IndexError if none can be matched.
+        """Return the list of pericopes that span BREF, a reference
+        object. Raise a KeyError if there's no pericope for its first
+        or last verse.
         """
-        assert isinstance(bref, bibleref.RangeVerseref) or isinstance(bref, bibleref.Verseref), \
-          'Not a (Range)Verseref object: %s' % bref
-        if isinstance(bref, bibleref.RangeVerseref):
-            start = bref.start
-            end = bref.end
-        elif isinstance(bref, bibleref.Verseref):
-            start = bref
-            end = bref
-        else:
-            raise TypeError('Not a (Range)Verseref object: %s' % bref)
-        try:
-            startp = self._pericopes[start]
-            endp = self._pericopes[end]
-            pericopes = [startp]
-            # since we've included all pericopes and they're
-            # sequenced, move forward from the start until you hit the
-            # end, then you've got them all
-            try:
-                while startp.ref < endp.ref:
-                    startp = startp.next
-                    pericopes.append(startp)
-                return pericopes
-            except:
-                raise ValueError('Failed collecting pericopes for %s' % bref)
-        except:
-            raise KeyError('No pericopes matching %s and %s' % (start, end))
+        assert isinstance(bref, core.GenericBibleref), \
+          'Not a reference object: %s' % bref
+        first, last = bref.ordinals
+        start = self._lookup(first)
+        end = self._lookup(last)
+        if start < 0 or end < 0:
+            raise KeyError('No pericopes matching %s and %s' % (bref.start, bref.end))
+        return self.pericopes[start:end + 1]
 
-    def write_as_json(self, outstr):
-        """Write pericope data as JSON to outstr. """
-        start = self.start
-        pdicts = []
-        while start.next:
-            pdicts.append(start.to_dict())
-            start = start.next
-        json.dump(pdicts, outstr, indent=2, sort_keys=True)
+    def save_snapshot(self, path):
+        """Write the set to PATH in a compact binary format that
+        load_snapshot() can map into memory.
 
+        The layout (all integers little-endian) is:
+        - header: magic, version, number of pericopes and of books,
+          size of the string table
+        - for each pericope, the offset and length of its refid and of
+          its title in the string table
+        - for each book, its index, the offset of its verse array in
+          the verse data, its length, and the position of its first
+          pericope
+        - verse data: the concatenated int32 verse arrays
+        - string table: UTF-8 refids and titles
+        """
+        strings = bytearray()
+        table = array('I')
+        for pericope in self.pericopes:
+            for string in (pericope.ref.refid, pericope.title):
+                encoded = string.encode('utf-8')
+                table.extend([len(strings), len(encoded)])
+                strings.extend(encoded)
+        books = array('I')
+        versedata = array('i')
+        for book in sorted(self._verseindex):
+            verses = self._verseindex[book]
+            books.extend([book, len(versedata), len(verses),
+                          self._bookstarts[Book(book).get_bookname()]])
+            versedata.extend(verses)
+        if sys.byteorder != 'little':
+            for data in (table, books, versedata):
+                data.byteswap()
+        with open(path, 'wb') as f:
+            f.write(_SNAPSHOT_HEADER.pack(_SNAPSHOT_MAGIC, _SNAPSHOT_VERSION, len(self.pericopes),
+                                          len(self._verseindex), len(strings)))
+            for data in (table, books, versedata):
+                data.tofile(f)
+            f.write(strings)
 
+    @classmethod
+    def load_snapshot(cls, path, pericopeclass=Pericope):
+        """Return a PericopeSet from a file written by save_snapshot().
 
+        The file is mapped into memory, and read in place, so processes
+        loading the same snapshot share one copy. Pericopes are only
+        built when they're used.
+        """
+        with open(path, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, npericopes, nbooks, nstrings = _SNAPSHOT_HEADER.unpack_from(mm)
+        assert magic == _SNAPSHOT_MAGIC, f"Not a pericope snapshot: {path}"
+        assert version == _SNAPSHOT_VERSION, f"Unsupported pericope snapshot version {version}: {path}"
+        view = memoryview(mm)
+        offset = _SNAPSHOT_HEADER.size
+        tablesize, booksize = 16 * npericopes, 16 * nbooks
+        table = view[offset:offset + tablesize].cast('I')
+        books = view[offset + tablesize:offset + tablesize + booksize].cast('I')
+        versestart = offset + tablesize + booksize
+        swap = sys.byteorder != 'little'
+        if swap:
+            table, books = array('I', table), array('I', books)
+            table.byteswap()
+            books.byteswap()
+        ps = cls(pericopeclass=pericopeclass)
+        # keep the mapping open as long as the set
+        ps._mmap = mm
+        for i in range(0, len(books), 4):
+            book, start, length, first = books[i:i + 4]
+            verses = view[versestart + 4 * start:versestart + 4 * (start + length)].cast('i')
+            if swap:
+                verses = array('i', verses)
+                verses.byteswap()
+            ps._verseindex[book] = verses
+            ps._bookstarts[Book(book).get_bookname()] = first
+        stringstart = len(mm) - nstrings
+        ps.pericopes = _SnapshotPericopes(table, view[stringstart:], ps._build)
+        return ps
 
+    def write_as_json(self, outstr):
+        """Write pericope data as JSON to outstr. """
+        pdicts = [pericope.to_dict() for pericope in self.pericopes]
+        json.dump(pdicts, outstr, indent=2, sort_keys=True)
@@ -0,0 +1,195 @@
+"""Find Bible references in free text.
+
+Unlike parse.py, which parses a string that's exactly one reference,
+this finds every reference in arbitrary prose in one pass, without
+calling the Biblia API.
+
+>>> from biblelib import scan
+>>> for found in scan.scan('Compare Mk 4:1-9; 5:2, 7 with Lk. 8:4-8.'):
+...     print(found)
+ScannedReference(start=8, end=16, ref=RangeVerseref('bible.62.4.1-62.4.9'))
+ScannedReference(start=18, end=21, ref=Verseref('bible.62.5.2'))
+ScannedReference(start=23, end=24, ref=Verseref('bible.62.5.7'))
+ScannedReference(start=30, end=39, ref=RangeVerseref('bible.63.8.4-63.8.8'))
+
+Continuations carry over the book (and chapter) of the previous
+reference: after a semicolon, a bare number is a chapter; after a
+comma, it's a verse if the previous reference was to verses.
+
+For large files, iter_scan() reads a line at a time, with offsets
+counting from the start of the file:
+
+>>> with open('sermon.txt') as f:
+...     refs = [found.ref for found in scan.iter_scan(f)]
+
+Caveats:
+
+* book names are matched as in parse.py, and short ones (like 'Am'
+  or 'Job') can be false positives in prose.
+* a book name and its chapter have to be on the same line.
+
+"""
+
+from collections import namedtuple
+import re
+
+from . import core
+from .books import Book
+from .parse import _make_bookname_trie, match_bookname
+
+
+# chapter, optional verse, optional end chapter or verse, optional end verse
+_TAIL_REGEXP = re.compile(r"(?<![\w:])(?P<chapter>\d{1,3})(?::(?P<verse>\d{1,3}))?"
+                          r"(?:\s?[-–—]\s?(?P<end>\d{1,3})(?::(?P<endverse>\d{1,3}))?)?(?!\d)")
+# what may come between a reference and its continuation
+_CONTINUATION_REGEXP = re.compile(r"\s*(?P<separator>[;,])\s*")
+# longest text between references that's kept across chunks
+_MAX_PENDING = 20
+
+# tries of book names spelled backwards, to match the name before a
+# chapter number
+_REVERSE_TRIE = _make_bookname_trie(reverse=True)
+_REVERSE_TRIE_I = _make_bookname_trie(ignorecase=True, reverse=True)
+
+ScannedReference = namedtuple('ScannedReference', ['start', 'end', 'ref'])
+
+
+class Scanner(object):
+    """Find references in a sequence of texts, carrying context (the
+    current book and chapter) from one text to the next. Offsets count
+    from the start of the first text."""
+
+    def __init__(self, ignorecase=False):
+        self.ignorecase = ignorecase
+        self.reset()
+
+    def reset(self):
+        """Forget any context and start offsets at zero again."""
+        self._offset = 0
+        # (book, chapter, level) of the last reference
+        self._context = None
+        # absolute offset where the last reference ended
+        self._contextend = 0
+        # text after the last reference from earlier texts
+        self._pending = ''
+
+    def scan(self, text):
+        """Yield a ScannedReference for each reference in TEXT."""
+        base = self._offset
+        self._offset += len(text)
+        for m in _TAIL_REGEXP.finditer(text):
+            found = self._match_book(text, m.start())
+            if found:
+                book, start = found
+                ref = self._makeref(book, m)
+            elif self._context:
+                start = m.start()
+                ref = self._continue(text, base, m)
+            else:
+                continue
+            if ref is None:
+                continue
+            yield ScannedReference(base + start, base + m.end(), ref)
+            end = ref.end if isinstance(ref, core.RangeChapterref) else ref
+            self._context = (ref.book, end.chapter,
+                             'verse' if isinstance(end, core.Verseref) else 'chapter')
+            self._contextend = base + m.end()
+        if self._context:
+            if self._contextend >= base:
+                self._pending = text[self._contextend - base:]
+            else:
+                self._pending += text
+            if len(self._pending) > _MAX_PENDING:
+                self._context = None
+
+    def _match_book(self, text, position):
+        """Return the book and start offset of the longest book name
+        ending just before the chapter at POSITION, or None."""
+        i = position - 1
+        if i < 0 or not text[i].isspace():
+            return None
+        while i >= 0 and text[i].isspace():
+            i -= 1
+        # abbreviations with periods
+        if i >= 0 and text[i] == '.':
+            i -= 1
+        node = _REVERSE_TRIE_I if self.ignorecase else _REVERSE_TRIE
+        found = None
+        while i >= 0:
+            char = text[i]
+            for char in (reversed(char.casefold()) if self.ignorecase else char):
+                node = node.get(char)
+                if node is None:
+                    return found
+            # names have to start at a word boundary
+            if '' in node and (i == 0 or not text[i - 1].isalnum()):
+                found = (node[''], i)
+            i -= 1
+        return found
+
+    def _continue(self, text, base, m):
+        """Return the reference for match M continuing the previous
+        reference, or None if it doesn't."""
+        if self._contextend >= base:
+            between = text[self._contextend - base:m.start()]
+        else:
+            between = self._pending + text[:m.start()]
+        separator = _CONTINUATION_REGEXP.fullmatch(between)
+        if not separator:
+            return None
+        # the number in '1 John' isn't a continuation
+        if match_bookname(text[m.start():m.start() + 40], ignorecase=self.ignorecase):
+            return None
+        book, chapter, level = self._context
+        if m.group('verse') is None and separator.group('separator') == ',' and level == 'verse':
+            return self._makeref(book, m, chapter=chapter)
+        return self._makeref(book, m)
+
+    @staticmethod
+    def _makeref(book, m, chapter=None):
+        """Return the reference for match M in BOOK, or None if it isn't
+        valid. With CHAPTER, numbers in M without colons are verses in
+        that chapter."""
+        groups = m.group('chapter', 'verse', 'end', 'endverse')
+        bookdata = Book(book) if isinstance(book, int) else book
+        chapters = bookdata.get_chapters()
+        if chapter is None and len(chapters) == 1 and groups[1] is None:
+            # 'Jude 6' is a verse
+            chapter = chapters[0]
+        if chapter is not None and groups[1] is None:
+            # numbers before any colon are verses in CHAPTER
+            first, verse = chapter, groups[0]
+            if groups[3] is not None:
+                end, endverse = groups[2], groups[3]
+            else:
+                end, endverse = (None, None) if groups[2] is None else (chapter, groups[2])
+        else:
+            first, verse, end, endverse = groups
+        if end is not None and endverse is None and verse is not None:
+            # 'Mk 4:1-9': the end is a verse
+            end, endverse = first, end
+        try:
+            start = core.makeBibleref(book=bookdata.index, chapter=first,
+                                      verse=-1 if verse is None else verse)
+            if end is None:
+                return start
+            end = core.makeBibleref(book=bookdata.index, chapter=end,
+                                    verse=-1 if endverse is None else endverse)
+            return core.makeRangeref(start=start, end=end)
+        except (core.BiblelibError, AssertionError, ValueError):
+            return None
+
+
+def scan(text, ignorecase=False):
+    """Return a list of ScannedReference tuples (start, end, ref) for
+    the references in TEXT, in order."""
+    return list(Scanner(ignorecase=ignorecase).scan(text))
+
+
+def iter_scan(file, ignorecase=False):
+    """Yield ScannedReference tuples for the references in FILE, an
+    iterable of lines like an open text file, in order. Offsets count
+    from the start of the file."""
+    scanner = Scanner(ignorecase=ignorecase)
+    for line in file:
+        yield from scanner.scan(line)
@@ -0,0 +1,205 @@
+"""Sets of verses, as bitmaps over ordinals.
+
+There are only about 40,000 verses in the whole Bible, so any set of
+them fits in a few kilobytes as one bit per ordinal (see books.py). A
+ReferenceSet keeps that bitmap in a Python int, so adding a range and
+set algebra are a few machine-word operations per 64 verses, rather
+than work for every verse.
+
+>>> from biblelib import core, sets
+>>> gospels = sets.ReferenceSet([core.makeBiblerefFromDTR(dtr) for dtr in
+...                              ['bible.61', 'bible.62', 'bible.63', 'bible.64']])
+>>> read = sets.ReferenceSet([core.makeBiblerefFromDTR('bible.62.4.1-62.5.43')])
+>>> len(gospels - read)
+3695
+>>> list(read & sets.ReferenceSet([core.makeBiblerefFromDTR('bible.62.5')]))
+[RangeVerseref('bible.62.5.1-62.5.43')]
+>>> list(sets.ReferenceSet([core.makeBiblerefFromDTR('bible.62.4.9'),
+...                         core.makeBiblerefFromDTR('bible.62.4.10-62.4.12')]))
+[RangeVerseref('bible.62.4.9-62.4.12')]
+
+Iterating yields the fewest references that cover the set: a
+RangeVerseref (or Verseref) for each run of consecutive verses, split
+at book boundaries. Psalm titles share verse 1's ordinal, so they
+aren't distinguished from it.
+
+"""
+
+from . import core
+from .versification import get_versification
+
+try:
+    _bit_count = int.bit_count
+except AttributeError:
+    # before Python 3.10
+    def _bit_count(bits):
+        return bin(bits).count('1')
+
+
+class ReferenceSet(object):
+    """A mutable set of verses in BIBLETYPE, from an iterable of
+    references REFS.
+    """
+    __slots__ = ('bibletype', '_bits')
+
+    def __init__(self, refs=(), bibletype='bible'):
+        assert bibletype in core.BIBLE_DATATYPES, "Invalid bible datatype: {}".format(bibletype)
+        self.bibletype = bibletype
+        self._bits = 0
+        for ref in refs:
+            self.add(ref)
+
+    @classmethod
+    def from_ordinals(cls, ordinals, bibletype='bible'):
+        """Return a ReferenceSet of the verses with ORDINALS."""
+        n_ordinals = get_versification(bibletype).n_ordinals
+        bitmap = bytearray((n_ordinals + 7) // 8)
+        for ordinal in ordinals:
+            assert 0 <= ordinal < n_ordinals, f"Invalid ordinal: {ordinal}"
+            bitmap[ordinal >> 3] |= 1 << (ordinal & 7)
+        refset = cls(bibletype=bibletype)
+        refset._bits = int.from_bytes(bitmap, 'little')
+        return refset
+
+    def _copy(self, bits):
+        refset = type(self)(bibletype=self.bibletype)
+        refset._bits = bits
+        return refset
+
+    def copy(self):
+        return self._copy(self._bits)
+
+    def _mask(self, ref):
+        """Return the bits for the verses in REF, a reference object."""
+        assert isinstance(ref, core.GenericBibleref), f"Not a reference object: {ref}"
+        assert ref.bibletype == self.bibletype, \
+            "{} must be in the same bible as {}".format(ref, self)
+        first, last = ref.ordinals
+        return ((1 << (last - first + 1)) - 1) << first
+
+    def _check(self, other):
+        assert isinstance(other, ReferenceSet), f"Not a ReferenceSet: {other}"
+        assert other.bibletype == self.bibletype, \
+            "{} and {} must be in the same bible".format(self, other)
+        return other._bits
+
+    def __repr__(self):
+        return "<ReferenceSet: {}, {} verses>".format(self.bibletype, len(self))
+
+    # adding and removing verses
+    def add(self, ref):
+        """Add the verses in REF, a reference object."""
+        self._bits |= self._mask(ref)
+
+    def discard(self, ref):
+        """Remove any of the verses in REF that are present."""
+        self._bits &= ~self._mask(ref)
+
+    def remove(self, ref):
+        """Remove the verses in REF: raise KeyError unless they're all
+        present."""
+        mask = self._mask(ref)
+        if self._bits & mask != mask:
+            raise KeyError(ref)
+        self._bits &= ~mask
+
+    def clear(self):
+        self._bits = 0
+
+    def __contains__(self, ref):
+        """True if all the verses in REF are in the set."""
+        if not isinstance(ref, core.GenericBibleref) or ref.bibletype != self.bibletype:
+            return False
+        mask = self._mask(ref)
+        return self._bits & mask == mask
+
+    def overlaps(self, ref):
+        """True if any of the verses in REF are in the set."""
+        return bool(self._bits & self._mask(ref))
+
+    def __len__(self):
+        """The number of verses in the set."""
+        return _bit_count(self._bits)
+
+    def __bool__(self):
+        return bool(self._bits)
+
+    def __eq__(self, other):
+        if not isinstance(other, ReferenceSet):
+            return NotImplemented
+        return self.bibletype == other.bibletype and self._bits == other._bits
+
+    # mutable, like set
+    __hash__ = None
+
+    # set algebra
+    def __or__(self, other):
+        return self._copy(self._bits | self._check(other))
+
+    def __and__(self, other):
+        return self._copy(self._bits & self._check(other))
+
+    def __sub__(self, other):
+        return self._copy(self._bits & ~self._check(other))
+
+    def __xor__(self, other):
+        return self._copy(self._bits ^ self._check(other))
+
+    def __ior__(self, other):
+        self._bits |= self._check(other)
+        return self
+
+    def __iand__(self, other):
+        self._bits &= self._check(other)
+        return self
+
+    def __isub__(self, other):
+        self._bits &= ~self._check(other)
+        return self
+
+    def __ixor__(self, other):
+        self._bits ^= self._check(other)
+        return self
+
+    union = __or__
+    intersection = __and__
+    difference = __sub__
+    symmetric_difference = __xor__
+
+    def issubset(self, other):
+        return self._bits & ~self._check(other) == 0
+
+    def issuperset(self, other):
+        return self._check(other) & ~self._bits == 0
+
+    __le__ = issubset
+    __ge__ = issuperset
+
+    # back to ordinals and references
+    def runs(self):
+        """Yield (first, last) tuples of ordinals for each run of
+        consecutive verses in the set, in order."""
+        bits = self._bits
+        ordinal = 0
+        while bits:
+            # skip to the next verse in the set
+            skip = (bits & -bits).bit_length() - 1
+            bits >>= skip
+            ordinal += skip
+            # the run is the trailing ones
+            length = (bits ^ (bits + 1)).bit_length() - 1
+            yield (ordinal, ordinal + length - 1)
+            bits >>= length
+            ordinal += length
+
+    def ordinals(self):
+        """Yield the ordinals of the verses in the set, in order."""
+        for first, last in self.runs():
+            yield from range(first, last + 1)
+
+    def __iter__(self):
+        """Yield the fewest Verserefs and RangeVerserefs covering the
+        set, in order."""
+        for first, last in self.runs():
+            yield from core._refs_from_ordinals(self.bibletype, first, last, 'verse')
+
@@ -0,0 +1,65 @@
+"""Test NumPy-backed reference arrays. """
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from biblelib import arrays, core
+from biblelib.core import ReferenceValidationError
+
+DTRS = ['bible.62.4.9', 'bible.62.4.1-62.4.9', 'bible.61.5', 'bible.19.3.title',
+        'bible+lxx.62', 'bible.62.3-62.4', 'bible.62.4.9']
+
+
+@pytest.fixture
+def refs():
+    return arrays.ReferenceArray.from_dtr(DTRS)
+
+
+class Test_ReferenceArray(object):
+    def test_roundtrip(self, refs):
+        assert len(refs) == 7
+        assert refs.to_dtr() == DTRS
+        assert [ref.refid for ref in refs.to_refs()] == DTRS
+        assert refs[1] is core.makeBiblerefFromDTR('bible.62.4.1-62.4.9')
+        assert arrays.ReferenceArray.from_refs(refs.to_refs()).to_dtr() == DTRS
+
+    def test_matches_objects(self, refs):
+        objects = [core.makeBiblerefFromDTR(dtr) for dtr in DTRS]
+        first, last = refs.ordinals()
+        assert list(zip(first.tolist(), last.tolist())) == [ref.ordinals for ref in objects]
+        assert refs.sortkeys().tolist() == [ref.sortkey for ref in objects]
+        assert refs.sort().to_dtr() == [ref.refid for ref in sorted(objects)]
+        assert refs.unique().to_dtr() == [ref.refid for ref in sorted(set(objects))]
+        mark4 = core.makeBiblerefFromDTR('bible.62.4')
+        assert refs.contains(mark4).tolist() == \
+          [ref.bibletype == 'bible' and mark4.subsumes(ref) for ref in objects]
+        assert refs.overlaps(mark4).tolist() == [True, True, False, False, False, True, True]
+        assert refs.verse_count().tolist() == [1, 9, 48, 1, 678, 76, 1]
+
+    def test_errors(self):
+        bad = ['bible.62.99', 'junk', '', 'bible.62.4.5-62.4.1', 'bible.62.4.1-63.1.1',
+               'bible.62.1.46', 'bible.62.1.12-62.2']
+        refs = arrays.ReferenceArray.from_dtr(bad, errors='filter')
+        assert refs.validate().tolist() == [False] * 6 + [True]
+        assert refs.to_dtr()[1:3] == [None, None]
+        with pytest.raises(ReferenceValidationError):
+            arrays.ReferenceArray.from_dtr(bad)
+
+    def test_verse_suffix(self):
+        dtrs = ['bible.62.4.9a', 'bible.62.4.9b-62.4.10a', 'bible.62.4.title']
+        refs = arrays.ReferenceArray.from_dtr(dtrs)
+        assert refs.to_dtr() == [core.makeBiblerefFromDTR(dtr).refid for dtr in dtrs]
+        assert refs.to_dtr()[0] == 'bible.62.4.9'
+
+    def test_versification(self):
+        dtrs = ['bible+bhs.39.3.24', 'bible+bhs.29.4.1-29.4.21', 'bible+bhs.39', 'bible.39.4.1']
+        refs = arrays.ReferenceArray.from_dtr(dtrs)
+        first, last = refs.ordinals()
+        assert list(zip(first.tolist(), last.tolist())) == \
+          [core.makeBiblerefFromDTR(dtr).ordinals for dtr in dtrs]
+        # no Mal 4 in bible+bhs, as for reference objects
+        with pytest.raises(ReferenceValidationError):
+            arrays.ReferenceArray.from_dtr(['bible+bhs.39.4.1'])
+        with pytest.raises(core.ReferenceValidationError):
+            core.makeBiblerefFromDTR('bible+bhs.39.4.1')
@@ -0,0 +1,214 @@
+"""Test the Biblia API client against a local stand-in server. """
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import asyncio
+import json
+import threading
+import time
+from urllib.parse import parse_qsl, urlsplit
+
+import pytest
+
+from biblelib import core, parse
+from biblelib.biblia import cache, client
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    """Answer every GET with JSON echoing its path and parameters,
+    after the server's DELAY, and with 429 for the first FAILURES.
+    Content is a line per verse, like 'Mk 4:9 text of 62.4.9'."""
+    # keep connections alive, like the real server
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        self.server.requests.append(self.path)
+        time.sleep(self.server.delay)
+        if self.server.failures:
+            self.server.failures -= 1
+            self.send_response(429)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        args = dict(parse_qsl(url.query))
+        result = {'path': url.path, 'args': args}
+        if '/content/' in url.path:
+            lines = ['{} text of {}'.format(verse.userstring(), verse.refid[len('bible.'):])
+                     for verse in parse.Parser().parse(args['passage'])]
+            result['text'] = '\r\n'.join(lines)
+        body = json.dumps(result).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def standin():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandinHandler)
+    server.requests = []
+    server.delay = 0
+    server.failures = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_api(server, apiclass=client.API, **kwargs):
+    return apiclass('testkey', base='http://127.0.0.1:{}/v1/bible'.format(server.server_port),
+                      cache=kwargs.pop('cache', {}), **kwargs)
+
+
+class Test_API(object):
+    def test_get(self, standin):
+        api = make_api(standin)
+        result = api.parse(passage='Mk 4:9', style='fullyQualified')
+        assert result == {'path': '/v1/bible/parse',
+                          'args': {'passage': 'Mk 4:9', 'style': 'fullyQualified', 'key': 'testkey'}}
+
+    def test_cache_key(self, standin):
+        api = make_api(standin)
+        api.parse(passage='Mk 4:9', style='fullyQualified')
+        # same arguments in a different order
+        api.parse(style='fullyQualified', passage='Mk 4:9')
+        assert len(standin.requests) == 1
+        # same arguments for a different service
+        api.scan(text='Mk 4:9')
+        api.tag(text='Mk 4:9')
+        assert len(standin.requests) == 3
+
+    def test_cache_base(self, standin):
+        apicache = {}
+        v1 = make_api(standin, cache=apicache).parse(passage='Mk 4:9')
+        v2 = client.API('testkey', base='http://127.0.0.1:{}/v2/bible'.format(standin.server_port),
+                        cache=apicache).parse(passage='Mk 4:9')
+        assert (v1['path'], v2['path']) == ('/v1/bible/parse', '/v2/bible/parse')
+        assert len(standin.requests) == 2
+
+
+class Test_AsyncAPI(object):
+    def test_methods(self, standin):
+        api = make_api(standin, apiclass=client.AsyncAPI)
+
+        async def fetch():
+            return await asyncio.gather(api.parse(passage='Mk 4:9'), api.scan(text='Mk 4:9'),
+                                        api.tag_markdown(text='Mk 4:9'))
+        parsed, scanned, tagged = asyncio.run(fetch())
+        assert parsed['path'] == '/v1/bible/parse'
+        assert scanned['path'] == '/v1/bible/scan'
+        assert tagged['args']['tagFormat'].startswith('[{text}]')
+
+    def test_coalescing(self, standin):
+        standin.delay = 0.05
+        apicache = {}
+        api = make_api(standin, apiclass=client.AsyncAPI, cache=apicache, concurrency=4)
+
+        async def fetch():
+            return await asyncio.gather(*[api.parse(passage='Mk 4:{}'.format(verse % 3 + 1))
+                                          for verse in range(12)])
+        results = asyncio.run(fetch())
+        assert [result['args']['passage'] for result in results[:3]] == ['Mk 4:1', 'Mk 4:2', 'Mk 4:3']
+        assert len(standin.requests) == 3
+        # the sync client shares the cache
+        assert make_api(standin, cache=apicache).parse(passage='Mk 4:2') == results[1]
+        assert len(standin.requests) == 3
+
+    def test_cache_off_loop(self, standin):
+        threads = []
+
+        class ThreadCache(dict):
+            def get(self, key, default=None):
+                threads.append(threading.current_thread())
+                return dict.get(self, key, default)
+
+        api = make_api(standin, apiclass=client.AsyncAPI, cache=ThreadCache())
+        asyncio.run(api.parse(passage='Mk 4:9'))
+        asyncio.run(api.parse(passage='Mk 4:9'))
+        assert len(standin.requests) == 1
+        assert threads and threading.main_thread() not in threads
+
+    def test_retry(self, standin):
+        standin.failures = 2
+        api = make_api(standin, apiclass=client.AsyncAPI, backoff=0.01)
+        assert asyncio.run(api.parse(passage='Mk 4:9'))['args']['passage'] == 'Mk 4:9'
+        assert len(standin.requests) == 3
+        standin.failures = 5
+        api.retries = 1
+        # the same client in a new event loop
+        with pytest.raises(client.requests.HTTPError):
+            asyncio.run(api.parse(passage='Mk 4:10'))
+
+
+class Test_content_many(object):
+    refs = [core.makeBiblerefFromDTR(dtr) for dtr in
+            ['bible.62.4.5-62.4.7', 'bible.62.4.1-62.4.3', 'bible.62.4.4', 'bible.63.1.1', 'bible.62.4.2']]
+
+    def test_merge_refs(self):
+        assert [ref.refid for ref in client.merge_refs(self.refs)] == \
+          ['bible.62.4.1-62.4.7', 'bible.63.1.1']
+
+    def test_content_many(self, standin):
+        texts = make_api(standin).content_many(self.refs)
+        assert len(standin.requests) == 2
+        assert texts[0] == 'text of 62.4.5 text of 62.4.6 text of 62.4.7'
+        assert texts[3:] == ['text of 63.1.1', 'text of 62.4.2']
+        assert 'style=oneVersePerLineFullReference' in standin.requests[0]
+
+    def test_async(self, standin):
+        api = make_api(standin, apiclass=client.AsyncAPI)
+        assert asyncio.run(api.content_many(self.refs)) == make_api(standin).content_many(self.refs)
+        assert len(standin.requests) == 4
+
+
+class Test_MemoryCache(object):
+    def test_lru(self):
+        apicache = cache.MemoryCache(maxsize=2)
+        apicache['a'] = {'text': 'A'}
+        apicache['b'] = {'text': 'B'}
+        assert apicache.get('a') == {'text': 'A'}
+        apicache['c'] = {'text': 'C'}
+        # b was the least recently used
+        assert 'b' not in apicache
+        assert len(apicache) == 2
+        assert isinstance(client.API._cache, cache.MemoryCache)
+
+
+class Test_SQLiteCache(object):
+    def test_persistent(self, standin, tmp_path):
+        path = str(tmp_path / 'biblia.sqlite')
+        first = make_api(standin, cache=cache.SQLiteCache(path)).parse(passage='Mk 4:9')
+        # a new cache on the same file, as after a restart
+        assert make_api(standin, cache=cache.SQLiteCache(path)).parse(passage='Mk 4:9') == first
+        assert len(standin.requests) == 1
+
+    def test_ttl(self, tmp_path):
+        apicache = cache.SQLiteCache(str(tmp_path / 'biblia.sqlite'), ttl=60)
+        apicache['a'] = {'text': 'A'}
+        assert apicache.get('a') == {'text': 'A'}
+        apicache.ttl = 0
+        time.sleep(0.01)
+        assert apicache.get('a') is None
+        assert len(apicache) == 0
+
+    def test_maxsize(self, tmp_path):
+        apicache = cache.SQLiteCache(str(tmp_path / 'biblia.sqlite'), maxsize=2)
+        for key in 'abc':
+            apicache[key] = key.upper()
+            time.sleep(0.001)
+        assert len(apicache) == 2
+        assert 'a' not in apicache
+        assert apicache['c'] == 'C'
+        # replacing an entry doesn't evict another
+        for _ in range(3):
+            apicache['c'] = 'C'
+        assert 'b' in apicache
+        apicache.clear()
+        for key in 'de':
+            apicache[key] = key.upper()
+        assert len(apicache) == 2
@@ -30,6 +30,41 @@ class TestMark(object):
         assert self.mark.get_vindex(16,20) == 677
         assert self.mark.get_vindex_dtr(677) == 'bible.62.16.20'
 
+    def test_vindex_chapter_verse(self):
+        # first verse of a chapter
+        assert self.mark.get_vindex_chapter_verse(45) == (2, 1)
+        assert self.mark.get_vindex_chapter_verse(115) == (4, 8)
+        assert all(self.mark.get_vindex_chapter_verse(vindex) == chapterverse
+                   for vindex, chapterverse in enumerate(self.mark.get_vindex_table()))
+        # books whose chapters don't start at 1
+        epjer = books.Book('EpJer')
+        assert epjer.get_vindex(6, 1) == 0
+        assert epjer.get_vindex_chapter_verse(0) == (6, 1)
+        assert books.Book('Ode').get_vindex_chapter_verse(books.Book('Ode').get_vindex(3, 1)) == (3, 1)
+
+    def test_ordinals(self):
+        assert books.Book('Ge').get_ordinal(1, 1) == 0
+        assert self.mark.get_ordinal(1, 1) == books.Book('Mt').get_ordinals()[1] + 1
+        assert self.mark.get_ordinal(16, 20) == self.mark.get_ordinal(1, 1) + 677
+        assert books.Book('Re').get_ordinals()[1] == books.n_ordinals - 1
+        assert books.get_ordinal_bcv(self.mark.get_ordinal(4, 8)) == (62, 4, 8)
+
+
+class Test_count_verses(object):
+    def test_count_verses(self):
+        assert books.count_verses() == books.n_ordinals
+        assert books.count_verses(62, 62) == books.Book('Mk').n_verses == 678
+        assert books.count_verses(61, 64) == 3779
+        assert books.count_verses(canon_tradition='Protestant') == \
+            sum(book.n_verses for book in books._books[1:] if book.in_canon('Protestant'))
+        # no Protestant books in the Apocrypha
+        assert books.count_verses(40, 60, canon_tradition='Protestant') == 0
+        with pytest.raises(AssertionError):
+            books.count_verses(canon_tradition='Ethiopian')
+
+    def test_count_books(self):
+        assert [books.count_books(canon) for canon in ['Catholic', 'Jewish', 'Protestant']] == [87, 39, 66]
+
 # class TestBooknames(object)
 
 #     def test_construction(self):
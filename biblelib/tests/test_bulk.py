@@ -0,0 +1,48 @@
+"""Test parallel bulk parsing. """
+
+from biblelib import bulk, core
+
+
+DTRS = ['bible.62.4.9\n', 'bible.62.99\n', ' bible.62.4.1-62.4.9 ']
+
+
+class Test_bulk_parse(object):
+    def test_dtr(self):
+        results = list(bulk.bulk_parse(DTRS, output='refid', workers=0))
+        assert [result.line for result in results] == [1, 2, 3]
+        assert [result.value for result in results] == ['bible.62.4.9', None, 'bible.62.4.1-62.4.9']
+        assert results[1].error == 'ReferenceValidationError: Invalid chapter index: 99'
+
+    def test_human(self):
+        results = list(bulk.bulk_parse(['Mark 4:9', 'Mrak 4:9', 'Mk 4:1-9'], kind='human',
+                                       output='indices', workers=0))
+        assert results[0].value == ('bible', 62, 4, 9)
+        assert results[1].value is None and results[1].error.startswith('ReferenceParserError')
+        assert results[2].value == (('bible', 62, 4, 1), ('bible', 62, 4, 9))
+
+    def test_logosref(self):
+        refs = [core.makeBiblerefFromDTR(dtr) for dtr in
+                ['bible.62.4.9', 'bible+bhs.1.1.1', 'bible.62', 'bible.62.4-62.6',
+                 'bible.62.4.1-62.5.3', 'bible.19.3.title', 'bible+lxx.67.1.1']]
+        results = list(bulk.bulk_parse([ref.refly_url() for ref in refs], kind='reflyref',
+                                       output='refid', workers=0))
+        assert [result.value for result in results] == [ref.refid for ref in refs]
+        # logosref URIs leave out the end chapter of verse ranges
+        results = list(bulk.bulk_parse([ref.logosref_uri() for ref in refs], kind='logosref',
+                                       output='refid', workers=0))
+        assert results[4].value == 'bible.62.4.1-62.4.3'
+        assert [result.value for result in results[:4] + results[5:]] == \
+          [ref.refid for ref in refs[:4] + refs[5:]]
+        results = list(bulk.bulk_parse(['Bible.Mk4.9', 'logosref:Bible.Xx4.9', 'logosref:Bible.Mk99'],
+                                       kind='logosref', output='refid', workers=0))
+        assert [result.error for result in results] == \
+          ['ValueError: Invalid Logos reference: Bible.Mk4.9',
+           'ValueError: Invalid Logos reference: logosref:Bible.Xx4.9',
+           'ReferenceValidationError: Invalid chapter index: 99']
+
+    def test_workers(self):
+        lines = DTRS * 10
+        serial = list(bulk.bulk_parse(lines, workers=0, chunksize=4))
+        assert list(bulk.bulk_parse(lines, workers=2, chunksize=4)) == serial
+        assert serial[0].value == (31919, 31919)
+        assert [result.line for result in serial] == list(range(1, 31))
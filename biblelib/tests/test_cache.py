@@ -0,0 +1,75 @@
+"""Test reference interning caches. """
+
+import gc
+
+import pytest
+
+from biblelib import cache, core
+
+
+@pytest.fixture
+def refcache():
+    refcache = cache.ReferenceCache(maxsize=3)
+    oldcache = core.set_reference_cache(refcache)
+    yield refcache
+    core.set_reference_cache(oldcache)
+
+
+class Test_ReferenceCache(object):
+    def test_lru(self):
+        refcache = cache.ReferenceCache(maxsize=2)
+        refcache['a'] = 1
+        refcache['b'] = 2
+        assert refcache.get('a') == 1
+        refcache['c'] = 3
+        # b was least recently used
+        assert 'b' not in refcache
+        assert 'a' in refcache and 'c' in refcache
+        assert refcache.get('b') is None
+        assert refcache.stats() == cache.CacheStats(hits=1, misses=1, evictions=1, size=2, maxsize=2)
+
+    def test_resize_clear(self):
+        refcache = cache.ReferenceCache(maxsize=None)
+        for i in range(10):
+            refcache[i] = str(i)
+        assert len(refcache) == 10
+        refcache.resize(3)
+        assert len(refcache) == 3
+        assert sorted(refcache._lru) == [7, 8, 9]
+        assert refcache.evictions == 7
+        refcache.clear()
+        assert len(refcache) == 0
+
+    def test_weak(self):
+        refcache = cache.ReferenceCache(maxsize=1, weak=True)
+        mark = core.Bookref(62)
+        refcache['bible.62'] = mark
+        refcache['bible.63'] = core.Bookref(63)
+        gc.collect()
+        # still referenced, so still interned
+        assert refcache.get('bible.62') is mark
+        del mark
+        refcache['bible.64'] = core.Bookref(64)
+        gc.collect()
+        assert 'bible.62' not in refcache
+        assert 'bible.64' in refcache
+
+
+class Test_interning(object):
+    def test_makeBibleref(self, refcache):
+        mk49 = core.makeBibleref(book=62, chapter=4, verse=9)
+        assert core.makeBiblerefFromDTR('bible.62.4.9') is mk49
+        assert refcache.hits == 1 and refcache.misses == 1
+
+    def test_bounded(self, refcache):
+        for verse in range(1, 10):
+            core.makeBibleref(book=62, chapter=4, verse=verse)
+        assert len(refcache) == 3
+        assert refcache.evictions == 6
+
+    def test_makeRangeref(self, refcache):
+        mk4_1_9 = core.makeBiblerefFromDTR('bible.62.4.1-62.4.9')
+        assert core.makeBiblerefFromDTR('bible.62.4.1-62.4.9') is mk4_1_9
+
+    def test_VerserefFromIndex(self, refcache):
+        assert core.VerserefFromIndex(book=62, index=115).refid == 'bible.62.4.8'
@@ -0,0 +1,55 @@
+"""Test the command-line tool. """
+
+import io
+import json
+import sys
+
+import pytest
+
+from biblelib import cli
+
+
+def run(argv, stdin, monkeypatch, capsys):
+    monkeypatch.setattr(sys, 'stdin', io.StringIO(stdin))
+    cli.main(argv)
+    return capsys.readouterr()
+
+
+class Test_cli(object):
+    def test_lines(self, monkeypatch, capsys):
+        captured = run(['--to', 'userstring'], 'bible.62.4.1-62.4.9\nbible.1.1.1\n', monkeypatch, capsys)
+        assert captured.out == 'Mk 4:1–9\nGe 1:1\n'
+
+    def test_human(self, monkeypatch, capsys):
+        captured = run(['--from', 'human', '--to', 'logosref_uri'], 'Mark 4:9\n', monkeypatch, capsys)
+        assert captured.out == 'logosref:Bible.Mk4.9\n'
+
+    def test_logosref(self, monkeypatch, capsys):
+        captured = run(['--from', 'reflyref', '--to', 'refid'],
+                       'https://ref.ly/logosref/Bible.Mk4.1-9\n', monkeypatch, capsys)
+        assert captured.out == 'bible.62.4.1-62.4.9\n'
+        captured = run(['--from', 'logosref', '--to', 'userstring'], 'logosref:Bible.Mk4.9\n',
+                       monkeypatch, capsys)
+        assert captured.out == 'Mk 4:9\n'
+
+    def test_errors(self, monkeypatch, capsys):
+        stdin = 'bible.62.99\nbible.62.4.9\n'
+        captured = run(['--to', 'refid', '--errors', 'filter', '--stats'], stdin, monkeypatch, capsys)
+        assert captured.out == '\nbible.62.4.9\n'
+        assert captured.err.startswith('2 lines, 1 errors')
+        captured = run(['--to', 'refid', '--errors', 'ignore'], stdin, monkeypatch, capsys)
+        assert captured.out == 'bible.62.99\nbible.62.4.9\n'
+        with pytest.raises(SystemExit, match='line 1: bible.62.99'):
+            run(['--to', 'refid'], stdin, monkeypatch, capsys)
+
+    def test_csv(self, monkeypatch, capsys):
+        captured = run(['--from', 'human', '--to', 'refid', '--format', 'csv', '--output-column', 'dtr'],
+                       'id,ref\n1,Mark 4:9\n2,Jn 3:16\n', monkeypatch, capsys)
+        assert captured.out == 'id,ref,dtr\n1,Mark 4:9,bible.62.4.9\n2,Jn 3:16,bible.64.3.16\n'
+
+    def test_jsonl(self, monkeypatch, capsys):
+        captured = run(['--to', 'ordinals', '--format', 'jsonl', '--jobs', '2', '--chunksize', '1'],
+                       '{"ref": "bible.62.4.9", "id": 1}\n{"ref": "bible.62.4.1-62.4.9", "id": 2}\n',
+                       monkeypatch, capsys)
+        assert [json.loads(line) for line in captured.out.splitlines()] == \
+          [{'ref': [31919, 31919], 'id': 1}, {'ref': [31911, 31919], 'id': 2}]
@@ -1,5 +1,8 @@
 """Test core reference functionality. """
 
+import pickle
+import sys
+
 import pytest
 
 
@@ -94,6 +97,138 @@ class Test_RangeVerseref(object):
         assert self.mark41_49.indices() == (('bible', 62, 4, 1), ('bible', 62, 4, 9))
 
 
+class Test_ordinals(object):
+    mark = core.Bookref(62)
+    mark4 = core.Chapterref(book=62, chapter=4)
+    mark41 = core.Verseref(book=62, chapter=4, verse=1)
+    mark49 = core.Verseref(book=62, chapter=4, verse=9)
+    mark41_49 = core.RangeVerseref(mark41, mark49)
+
+    def test_ordinals(self):
+        assert core.Verseref(book=1, chapter=1, verse=1).ordinal == 0
+        assert self.mark49.ordinal == self.mark41.ordinal + 8
+        assert self.mark41_49.ordinals == (self.mark41.ordinal, self.mark49.ordinal)
+        assert self.mark4.ordinals == (self.mark41.ordinal, self.mark41.ordinal + 40)
+        assert self.mark.ordinals[1] - self.mark.ordinals[0] == 677
+        # titles share the ordinal of verse 1
+        assert core.Verseref(book=19, chapter=3, verse=0).ordinal == \
+          core.Verseref(book=19, chapter=3, verse=1).ordinal
+
+    def test_order(self):
+        refs = [self.mark49, self.mark41_49, self.mark4, self.mark41, self.mark,
+                core.Bookref(61), core.Verseref(bibletype='bible+na27', book=61, chapter=1, verse=1)]
+        expected = sorted(refs, key=lambda ref: (ref.start.indices(), ref.end.indices()))
+        assert sorted(refs) == expected
+        assert [ref.refid for ref in expected] == \
+          ['bible.61', 'bible.62', 'bible.62.4', 'bible.62.4.1', 'bible.62.4.1-62.4.9',
+           'bible.62.4.9', 'bible+na27.61.1.1']
+
+    def test_eq_hash(self):
+        assert self.mark41_49 == core.RangeVerseref(self.mark41, self.mark49)
+        assert len({self.mark41_49, core.makeBiblerefFromDTR('bible.62.4.1-62.4.9')}) == 1
+        assert self.mark41 != self.mark41_49
+        assert self.mark41 != 'bible.62.4.1'
+        # same verses, different levels
+        assert core.Bookref(86) != core.Chapterref(book=86, chapter=1)
+
+
+class Test_iterverses(object):
+    mark = core.Bookref(62)
+    mark4 = core.Chapterref(book=62, chapter=4)
+    mark41 = core.Verseref(book=62, chapter=4, verse=1)
+    mark440 = core.Verseref(book=62, chapter=4, verse=40)
+    mark52 = core.Verseref(book=62, chapter=5, verse=2)
+    mark4_5 = core.RangeChapterref(mark4, core.Chapterref(book=62, chapter=5))
+
+    def test_refs(self):
+        verses = list(core.RangeVerseref(self.mark440, self.mark52))
+        assert [vref.refid for vref in verses] == \
+          ['bible.62.4.40', 'bible.62.4.41', 'bible.62.5.1', 'bible.62.5.2']
+        # interned
+        assert verses[0] is core.makeBibleref(book=62, chapter=4, verse=40)
+        assert list(self.mark41) == [self.mark41]
+        assert len(list(self.mark4)) == 41
+        assert len(list(self.mark4_5)) == 41 + 43
+        assert len(list(self.mark)) == 678
+
+    def test_forms(self):
+        assert list(self.mark4.iterverses(form='tuple'))[-1] == (62, 4, 41)
+        ordinals = list(self.mark.iterverses(form='ordinal'))
+        assert ordinals[0] == self.mark.ordinals[0] and ordinals[-1] == self.mark.ordinals[1]
+        assert core.RangeVerseref(self.mark440, self.mark52).enumerateverses()[-1] == self.mark52
+
+    def test_contains(self):
+        assert self.mark41 in self.mark4
+        assert self.mark52 not in self.mark4
+        assert self.mark52 in self.mark4_5
+        assert self.mark4_5 in self.mark
+        assert self.mark not in self.mark4_5
+
+
+class Test_arithmetic(object):
+    def dtr(self, ref):
+        return core.makeBiblerefFromDTR(ref)
+
+    def refids(self, refs):
+        return [ref.refid for ref in refs]
+
+    def test_overlaps_subsumes(self):
+        mark4_1_9 = self.dtr('bible.62.4.1-62.4.9')
+        assert mark4_1_9.overlaps(self.dtr('bible.62.4.9-62.5.1'))
+        assert not mark4_1_9.overlaps(self.dtr('bible.62.4.10'))
+        assert self.dtr('bible.62.4').subsumes(mark4_1_9)
+        assert self.dtr('bible.62.3-62.4').subsumes(self.dtr('bible.62.4'))
+        assert not mark4_1_9.subsumes(self.dtr('bible.62.4'))
+        assert mark4_1_9.subsumes(mark4_1_9)
+
+    def test_intersection(self):
+        assert self.dtr('bible.62.4.1-62.4.9').intersection(self.dtr('bible.62.4.5-62.5.3')) == \
+          self.dtr('bible.62.4.5-62.4.9')
+        assert self.dtr('bible.62.4').intersection(self.dtr('bible.62.4.41-62.5.2')) == \
+          self.dtr('bible.62.4.41')
+        assert self.dtr('bible.62.2-62.4').intersection(self.dtr('bible.62.3-62.6')) == \
+          self.dtr('bible.62.3-62.4')
+        assert self.dtr('bible.62.4.1').intersection(self.dtr('bible.62.4.2')) is None
+
+    def test_union(self):
+        assert self.refids(self.dtr('bible.62.4.1-62.4.9').union(self.dtr('bible.62.4.10-62.4.12'))) == \
+          ['bible.62.4.1-62.4.12']
+        assert self.refids(self.dtr('bible.62.4').union(self.dtr('bible.62.5.1-62.5.3'))) == \
+          ['bible.62.4.1-62.5.3']
+        assert self.refids(self.dtr('bible.62.5').union(self.dtr('bible.62.3-62.4'))) == \
+          ['bible.62.3-62.5']
+        assert self.refids(self.dtr('bible.62.5.1').union(self.dtr('bible.62.4.1'))) == \
+          ['bible.62.4.1', 'bible.62.5.1']
+        # adjacent, but in different books
+        assert len(self.dtr('bible.61.28').union(self.dtr('bible.62.1'))) == 2
+
+    def test_difference(self):
+        assert self.refids(self.dtr('bible.62.4').difference(self.dtr('bible.62.4.1-62.4.9'))) == \
+          ['bible.62.4.10-62.4.41']
+        assert self.refids(self.dtr('bible.62.1-62.5').difference(self.dtr('bible.62.3'))) == \
+          ['bible.62.1-62.2', 'bible.62.4-62.5']
+        assert self.refids(self.dtr('bible.62').difference(self.dtr('bible.62.1-62.15'))) == \
+          ['bible.62.16']
+        assert self.dtr('bible.62.4.2').difference(self.dtr('bible.62.4')) == []
+
+
+class Test_slots(object):
+    def test_immutable(self):
+        mark49 = core.Verseref(book=62, chapter=4, verse=9)
+        assert not hasattr(mark49, '__dict__')
+        with pytest.raises(AttributeError):
+            mark49.verse = 10
+        with pytest.raises(AttributeError):
+            mark49.color = 'red'
+        assert mark49.refid == 'bible.62.4.9'
+
+    def test_pickle(self):
+        mark4_1_9 = core.makeBiblerefFromDTR('bible.62.4.1-62.4.9')
+        assert pickle.loads(pickle.dumps(mark4_1_9)) is mark4_1_9
+        assert pickle.loads(pickle.dumps(core.Verseref(book=19, chapter=3, verse=0))).refid == \
+          'bible.19.3.title'
+
+
 class Test_makeBibleref(object):
     def test_makeBibleref(self):
         assert core.makeBibleref(book=62).refid == 'bible.62'
@@ -112,3 +247,89 @@ class Test_makeRangeref(object):
         assert core.makeRangeref(self.mark41, self.mark49).refid == 'bible.62.4.1-62.4.9'
 
 # need tests for makeBiblerefFromDTR
+
+
+class Test_parse_dtr_batch(object):
+    def test_parse_dtr_batch(self):
+        refs, errors = core.parse_dtr_batch(['bible.62.4.9', 'bible.62.4.1-62.4.9', 'bible.19.3.title',
+                                             'bible.62.4.9'])
+        assert [ref.refid for ref in refs] == ['bible.62.4.9', 'bible.62.4.1-62.4.9',
+                                               'bible.19.3.title', 'bible.62.4.9']
+        assert refs[0] is refs[3] is core.makeBiblerefFromDTR('bible.62.4.9')
+        assert errors == []
+
+    def test_memo_size(self, monkeypatch):
+        monkeypatch.setattr(core, '_DTR_BATCH_MEMO_SIZE', 2)
+        parseDTR = core._parseDTR
+        # memo length seen by each parse, read from parse_dtr_batch()'s frame
+        sizes = []
+
+        def counting_parseDTR(ref):
+            sizes.append(len(sys._getframe(1).f_locals['seen']))
+            return parseDTR(ref)
+
+        monkeypatch.setattr(core, '_parseDTR', counting_parseDTR)
+        dtrs = ['bible.62.4.{}'.format(verse % 5 + 1) for verse in range(20)]
+        refs, errors = core.parse_dtr_batch(dtrs)
+        assert [ref.refid for ref in refs] == dtrs
+        # cycling through 5 inputs with room for 2, every one is a miss
+        assert len(sizes) == len(dtrs)
+        assert max(sizes) <= 2
+
+    def test_errors(self):
+        dtrs = ['bible.62.99', 'bible.62.4.9', 'nonsense', 'bible.1.1.1.1']
+        with pytest.raises(core.ReferenceValidationError):
+            core.parse_dtr_batch(dtrs)
+        refs, errors = core.parse_dtr_batch(dtrs, errors='filter')
+        assert refs == [None, core.makeBibleref(book=62, chapter=4, verse=9), None, None]
+        assert [error.index for error in errors] == [0, 2, 3]
+        assert errors[0] == core.DTRError(index=0, input='bible.62.99',
+                                          message='ReferenceValidationError: Invalid chapter index: 99')
+        refs, errors = core.parse_dtr_batch(dtrs, errors='ignore')
+        assert refs[2] == 'nonsense'
+        assert len(errors) == 3
+
+
+class Test_verse_count(object):
+    @pytest.mark.parametrize('dtr, count', [
+        ('bible.62', 678),
+        ('bible.62.4', 41),
+        ('bible.62.4.9', 1),
+        ('bible.62.4-62.5', 84),
+        ('bible.62.4.1-62.4.9', 9),
+        ('bible.62.4.40-62.5.2', 4),
+        # the title shares verse 1's ordinal
+        ('bible.19.3.title', 1),
+    ])
+    def test_verse_count(self, dtr, count):
+        assert core.makeBiblerefFromDTR(dtr).verse_count() == count
+
+    def test_sublevel_length(self):
+        assert core.makeBiblerefFromDTR('bible.62.4-62.5').sublevel_length() == 84
+        assert core.Bookref(62).sublevel_length() == 16
+
+
+class Test_format_many(object):
+    dtrs = ['bible.62', 'bible.62.4', 'bible.62.4-62.6', 'bible.62.4.9', 'bible.62.4.1-62.4.9',
+            'bible.62.4.1-62.5.3', 'bible.19.3.title', 'bible+lxx.62.4.9', 'bible.59.1.1']
+    refs = [core.makeBiblerefFromDTR(dtr) for dtr in dtrs]
+
+    def test_format_many(self):
+        assert core.format_many(self.refs[:6]) == \
+            ['Mk', 'Mk 4', 'Mk 4–6', 'Mk 4:9', 'Mk 4:1–9', 'Mk 4:1–5:3']
+        assert core.format_many(self.refs[4:6], style='refly_url') == \
+            ['https://ref.ly/logosref/Bible.Mk4.1-9', 'https://ref.ly/logosref/Bible.Mk4.1-5:3']
+        assert core.format_many(self.refs[3:4], language='de', withbibletype=True) == ['Bible:Mk 4:9']
+        assert core.format_many(self.refs[:1], language='ko') == ['막']
+        with pytest.raises(AssertionError):
+            core.format_many(self.refs, style='html')
+
+    @pytest.mark.parametrize('language', ['en', 'es', 'zh-Hant'])
+    def test_methods(self, language):
+        """format_many() is the same as the methods."""
+        for withbibletype in (False, True):
+            assert core.format_many(self.refs, language=language, withbibletype=withbibletype) == \
+                [ref.userstring(language, withbibletype=withbibletype) for ref in self.refs]
+        for style in ['refly_url', 'logosref_uri']:
+            assert core.format_many(self.refs, style=style) == \
+                [getattr(ref, style)() for ref in self.refs]
@@ -18,3 +18,10 @@ class TestGospels(object):
         assert gospels.n_verses == 3779
         assert gospels.in_canon('Catholic')
         assert not(gospels.in_canon('Jewish'))
+
+    def test_verse_count(self):
+        gospels = groups.groupnames['Gospels']
+        assert gospels.verse_count() == gospels.n_verses
+        assert gospels.verse_count('Protestant') == 3779
+        assert gospels.verse_count('Jewish') == 0
+        assert groups.groupnames['Apocrypha'].verse_count('Catholic') == groups.groupnames['Apocrypha'].n_verses
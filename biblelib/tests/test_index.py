@@ -0,0 +1,73 @@
+"""Test the reference index. """
+
+import random
+
+import pytest
+
+from biblelib import core, index
+
+
+def dtr(ref):
+    return core.makeBiblerefFromDTR(ref)
+
+
+@pytest.fixture
+def refindex():
+    return index.ReferenceIndex([(dtr('bible.62.4.1-62.4.20'), 'doc1'),
+                                 (dtr('bible.62.4.3'), 'doc2'),
+                                 (dtr('bible.62.5'), 'doc3'),
+                                 (dtr('bible.62'), 'doc4')])
+
+
+class Test_ReferenceIndex(object):
+    def test_queries(self, refindex):
+        assert refindex.overlapping(dtr('bible.62.4.1-62.4.9')) == ['doc4', 'doc1', 'doc2']
+        assert refindex.overlapping(dtr('bible.62.4.21-62.5.1'), count=True) == 2
+        assert refindex.overlapping(dtr('bible.63.1')) == []
+        assert refindex.contained(dtr('bible.62.4')) == ['doc1', 'doc2']
+        assert refindex.containing(dtr('bible.62.4.3-62.4.4')) == ['doc4', 'doc1']
+        assert refindex.at(dtr('bible.62.5.3')) == ['doc4', 'doc3']
+        assert refindex.at(dtr('bible.62.4.3').ordinal, count=True) == 3
+
+    def test_insert_delete(self, refindex):
+        refindex.insert(dtr('bible.62.4.2-62.4.4'), 'doc5')
+        assert refindex.at(dtr('bible.62.4.3')) == ['doc4', 'doc1', 'doc5', 'doc2']
+        refindex.delete(dtr('bible.62.4.3'), 'doc2')
+        assert refindex.at(dtr('bible.62.4.3')) == ['doc4', 'doc1', 'doc5']
+        assert refindex.overlapping(dtr('bible.62.4.3'), count=True) == 3
+        assert len(refindex) == 4
+        with pytest.raises(KeyError):
+            refindex.delete(dtr('bible.62.4.3'), 'doc2')
+
+    def test_naive(self):
+        rng = random.Random(4)
+        mark = core.Bookref(62)
+        verses = list(mark)
+        records = []
+        for i in range(200):
+            start, end = sorted(rng.sample(range(len(verses)), 2))
+            records.append((core.makeRangeref(verses[start], verses[end]), i))
+        records.extend([(verses[5], 200), (mark, 201)])
+        refindex = index.ReferenceIndex(records[:100])
+        for ref, value in records[100:]:
+            refindex.insert(ref, value)
+        for query in [verses[10], core.makeRangeref(verses[100], verses[150]), core.Chapterref(book=62, chapter=9)]:
+            assert sorted(refindex.overlapping(query)) == \
+              sorted(value for ref, value in records if ref.overlaps(query))
+            assert refindex.overlapping(query, count=True) == len(refindex.overlapping(query))
+            assert sorted(refindex.contained(query)) == \
+              sorted(value for ref, value in records if query.subsumes(ref))
+            assert sorted(refindex.containing(query)) == \
+              sorted(value for ref, value in records if ref.subsumes(query))
+            for method in [refindex.overlapping, refindex.contained, refindex.containing]:
+                assert method(query, count=True) == len(method(query))
+            assert refindex.at(query.ordinals[0], count=True) == len(refindex.at(query.ordinals[0]))
+        assert [value for ref, value in refindex] == \
+          [value for ref, value in sorted(records, key=lambda record: record[0].ordinals)]
+
+    def test_delete_long(self, refindex):
+        refindex.delete(dtr('bible.62'), 'doc4')
+        # the longest remaining record bounds queries again
+        assert max(refindex._buckets) == index._bucket(dtr('bible.62.5').ordinals[1] -
+                                                       dtr('bible.62.5').ordinals[0])
+        assert refindex.at(dtr('bible.62.5.3')) == ['doc3']
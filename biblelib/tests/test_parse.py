@@ -2,7 +2,7 @@
 
 import pytest
 
-from biblelib import parse
+from biblelib import cache, core, parse
 
 
 @pytest.fixture
@@ -25,3 +25,86 @@ class Test_Parser(object):
 
     def test_RangeChapterref(self, Parser):
         assert Parser.parse('Mark 3-4').refid == 'bible.62.3-62.4'
+
+    def test_multiword_bookname(self, Parser):
+        assert Parser.parse('1 Sam 24:5').refid == 'bible.9.24.5'
+        assert Parser.parse('Song of Songs 1:2').refid == 'bible.22.1.2'
+        # longest match, not 'Ps'
+        assert Parser.parse('Ps Sol 3:4').refid == 'bible.59.3.4'
+
+
+class Test_match_bookname(object):
+    def test_match_bookname(self):
+        assert parse.match_bookname('Mark 3:4') == (parse.Book(62), '3:4')
+        assert parse.match_bookname('Wisdom of Solomon 3:4') == (parse.Book('Wis'), '3:4')
+        # the name has to be followed by a space and something more
+        assert parse.match_bookname('Mark') is None
+        assert parse.match_bookname('Mark ') is None
+        assert parse.match_bookname('Markus 3') is None
+
+    def test_ignorecase(self):
+        assert parse.match_bookname('mark 3:4') is None
+        assert parse.match_bookname('mark 3:4', ignorecase=True) == (parse.Book(62), '3:4')
+        assert parse.match_bookname('1 SAM 24:5', ignorecase=True) == (parse.Book(9), '24:5')
+
+
+class Test_languages(object):
+    @pytest.mark.parametrize('language, string, refid', [
+        ('de', 'Mk 4,1-9', 'bible.62.4.1-62.4.9'),
+        ('es', '1 Sm 24:5', 'bible.9.24.5'),
+        ('es', '1Sm 24:5', 'bible.9.24.5'),
+        ('de', '1 Sa 1,1', 'bible.9.1.1'),
+        ('pt', '2 Rs 3:4', 'bible.12.3.4'),
+        # not John, as in English
+        ('pt', 'Jn 1:2', 'bible.32.1.2'),
+        ('ko', '삼상 24:5', 'bible.9.24.5'),
+        ('ko', '삼상24:5', 'bible.9.24.5'),
+        ('zh-Hans', '可4:1-9', 'bible.62.4.1-62.4.9'),
+        ('zh-Hant', '創 1：1', 'bible.1.1.1'),
+        # English abbreviations from biblebooks.py
+        ('en', 'Ps Sol 3:4', 'bible.59.3.4'),
+    ])
+    def test_parse(self, language, string, refid):
+        assert parse.Parser(language=language).parse(string).refid == refid
+
+    def test_roundtrip(self):
+        refs = [core.makeBiblerefFromDTR(dtr) for dtr in
+                ['bible.1.1.1', 'bible.9.24.5-9.24.7', 'bible.42.10.4', 'bible.62.4-62.5', 'bible.87.1.1']]
+        for language in parse.LANGUAGES:
+            parser = parse.Parser(language=language)
+            assert [parser.parse(string) for string in core.format_many(refs, language=language)] == refs
+
+    def test_shared(self):
+        parse.Parser(language='ko')
+        assert parse.match_bookname('막 4:9', language='ko')[1] == '4:9'
+        assert parse._bookname_trie('ko') is parse._bookname_trie('ko')
+        # English names need a space
+        assert parse.match_bookname('Mk4:9') is None
+        with pytest.raises(AssertionError):
+            parse.Parser(language='la')
+
+
+class Test_memo(object):
+    def test_interned(self, Parser):
+        mk49 = Parser.parse('Mark 4:9')
+        assert mk49 is core.makeBiblerefFromDTR('bible.62.4.9')
+        assert Parser.parse('Mk 4:1-9') is core.makeBiblerefFromDTR('bible.62.4.1-62.4.9')
+
+    def test_normalized(self, Parser):
+        assert parse.normalize(' Mk.  4:1–9 ') == 'Mk 4:1-9'
+        first = Parser.parse('Mk 4:1-9')
+        assert Parser.parse(' Mk.  4:1–9 ') is first
+        assert Parser.cache_stats() == cache.CacheStats(hits=1, misses=1, evictions=0, size=1, maxsize=2**16)
+        Parser.clear_cache()
+        assert Parser.cache_stats().size == 0 and Parser.cache_stats().hits == 0
+
+    def test_bounded(self):
+        parser = parse.Parser(cachesize=2)
+        for verse in range(1, 6):
+            parser.parse('Mark 4:{}'.format(verse))
+        stats = parser.cache_stats()
+        assert (stats.size, stats.evictions) == (2, 3)
+        # errors aren't memoized
+        with pytest.raises(parse.ReferenceParserError):
+            parser.parse('Mark 4:1 and more')
+        assert parser.cache_stats().size == 2
@@ -0,0 +1,106 @@
+"""Test pericope sets. """
+
+import io
+import json
+
+import pytest
+
+from biblelib import core
+from biblelib.pericopes import PericopeSet
+
+
+XML = """<?xml version="1.0" encoding="utf-8"?>
+<pericopes>
+  <pericope ref="bible.1.1.1-1.1.5"><title>Paragraph 1</title></pericope>
+  <pericope ref="bible.1.1.6-1.1.8"><title>Paragraph 2</title></pericope>
+  <pericope ref="bible.1.1.9-1.1.13"><title>Paragraph 3</title></pericope>
+  <pericope ref="bible.62.4.1-62.4.9"><title>The Parable of the Sower</title></pericope>
+  <pericope ref="bible.62.4.10-62.4.12"><title>The Purpose of the Parables</title></pericope>
+</pericopes>
+"""
+
+
+@pytest.fixture
+def pericopes(tmp_path):
+    (tmp_path / 'pericopes.xml').write_text(XML, encoding='utf-8')
+    ps = PericopeSet()
+    ps.read(pdir=str(tmp_path), file='pericopes.xml')
+    return ps
+
+
+class Test_PericopeSet(object):
+    def test_read(self, pericopes):
+        assert len(pericopes) == 5
+        assert repr(pericopes.start) == "Pericope('Ge 1:1–5', 'Paragraph 1')"
+        assert pericopes.start.next.title == 'Paragraph 2'
+        assert pericopes.book_starts['Mark'].title == 'The Parable of the Sower'
+        assert pericopes.book_starts['Mark'].bookindex == 0
+        assert pericopes.pericopes[2].bookindex == 2
+        assert pericopes[core.makeBiblerefFromDTR('bible.1.1.6-1.1.8')].title == 'Paragraph 2'
+
+    def test_find(self, pericopes):
+        find = pericopes.find
+        assert [p.title for p in find(core.makeBiblerefFromDTR('bible.1.1.4-1.1.10'))] == \
+          ['Paragraph 1', 'Paragraph 2', 'Paragraph 3']
+        assert [p.title for p in find(core.makeBiblerefFromDTR('bible.1.1.7'))] == ['Paragraph 2']
+        assert [p.title for p in find(core.makeBiblerefFromDTR('bible.62.4.9-62.4.10'))] == \
+          ['The Parable of the Sower', 'The Purpose of the Parables']
+        with pytest.raises(KeyError):
+            find(core.makeBiblerefFromDTR('bible.1.1.20'))
+        with pytest.raises(KeyError):
+            find(core.makeBiblerefFromDTR('bible.63.1.1'))
+
+    def test_order(self, pericopes):
+        with pytest.raises(AssertionError):
+            pericopes.add('bible.1.1.14', 'Out of order')
+
+    def test_write_as_json(self, pericopes):
+        outstr = io.StringIO()
+        pericopes.write_as_json(outstr)
+        pdicts = json.loads(outstr.getvalue())
+        assert len(pdicts) == 5
+        assert pdicts[1]['previous'] == 'bible.1.1.1-1.1.5'
+        assert pdicts[4]['next'] is None
+
+
+class Test_snapshot(object):
+    def test_round_trip(self, pericopes, tmp_path):
+        path = str(tmp_path / 'pericopes.snapshot')
+        pericopes.save_snapshot(path)
+        loaded = PericopeSet.load_snapshot(path)
+        assert [p.to_dict() for p in loaded.pericopes] == [p.to_dict() for p in pericopes.pericopes]
+        assert loaded.book_starts.keys() == pericopes.book_starts.keys()
+        for dtr in ['bible.1.1.4-1.1.10', 'bible.62.4.9-62.4.10', 'bible.1.1.6']:
+            bref = core.makeBiblerefFromDTR(dtr)
+            assert [p.title for p in loaded.find(bref)] == [p.title for p in pericopes.find(bref)]
+        with pytest.raises(KeyError):
+            loaded.find(core.makeBiblerefFromDTR('bible.1.1.20'))
+        # still extendable
+        loaded.add('bible.62.4.13-62.4.20', 'The Parable of the Sower Explained')
+        assert loaded.find(core.makeBiblerefFromDTR('bible.62.4.15'))[0].title == \
+          'The Parable of the Sower Explained'
+
+    def test_lazy(self, pericopes, tmp_path):
+        path = str(tmp_path / 'pericopes.snapshot')
+        pericopes.save_snapshot(path)
+        loaded = PericopeSet.load_snapshot(path)
+        assert len(loaded) == 5
+        assert loaded.pericopes._pericopes == [None] * 5
+        pericope = loaded.find(core.makeBiblerefFromDTR('bible.1.1.10'))[0]
+        assert pericope.bookindex == 2
+        assert pericope.previous.bookindex == 1
+        assert sum(p is not None for p in loaded.pericopes._pericopes) == 2
+        # looked up by reference without building the others
+        assert loaded[pericope.ref] is pericope
+        assert pericope.previous.ref in loaded
+        assert core.makeBiblerefFromDTR('bible.1.1.9') not in loaded
+        assert sum(p is not None for p in loaded.pericopes._pericopes) == 2
+
+    def test_version(self, pericopes, tmp_path):
+        path = tmp_path / 'pericopes.snapshot'
+        pericopes.save_snapshot(str(path))
+        data = bytearray(path.read_bytes())
+        data[4] = 99
+        path.write_bytes(bytes(data))
+        with pytest.raises(AssertionError, match='version 99'):
+            PericopeSet.load_snapshot(str(path))
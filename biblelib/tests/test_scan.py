@@ -0,0 +1,43 @@
+"""Test finding references in free text. """
+
+import io
+
+from biblelib import core, scan
+
+
+def refids(found):
+    return [item.ref.refid for item in found]
+
+
+class Test_scan(object):
+    def test_scan(self):
+        text = 'Compare Mk 4:1-9 with Lk. 8:4-8 and Rev 21–22.'
+        found = scan.scan(text)
+        assert refids(found) == ['bible.62.4.1-62.4.9', 'bible.63.8.4-63.8.8', 'bible.87.21-87.22']
+        assert [text[item.start:item.end] for item in found] == ['Mk 4:1-9', 'Lk. 8:4-8', 'Rev 21–22']
+
+    def test_continuation(self):
+        assert refids(scan.scan('Mk 4:1-9; 5:2, 7')) == ['bible.62.4.1-62.4.9', 'bible.62.5.2', 'bible.62.5.7']
+        # after a chapter, or a semicolon, bare numbers are chapters
+        assert refids(scan.scan('Gen 1, 3; 5')) == ['bible.1.1', 'bible.1.3', 'bible.1.5']
+        assert refids(scan.scan('Mk 4:1; 5')) == ['bible.62.4.1', 'bible.62.5']
+        # only directly after a reference
+        assert refids(scan.scan('Mk 4:1 and 5')) == ['bible.62.4.1']
+        # a book name starting with a number isn't a continuation
+        assert refids(scan.scan('Mk 4:1; 1 John 3:16')) == ['bible.62.4.1', 'bible.83.3.16']
+
+    def test_one_chapter_books(self):
+        assert refids(scan.scan('Jude 6, 9')) == ['bible.86.1.6', 'bible.86.1.9']
+        assert refids(scan.scan('Jude 3-5; 9')) == ['bible.86.1.3-86.1.5', 'bible.86.1.9']
+        assert refids(scan.scan('Mk 4:1, 5-7')) == ['bible.62.4.1', 'bible.62.4.5-62.4.7']
+
+    def test_not_references(self):
+        assert scan.scan('In 2020, 5 people read Mark 99.') == []
+        assert scan.scan('Remark 4') == []
+        assert refids(scan.scan('mark 4:1')) == []
+        assert refids(scan.scan('mark 4:1', ignorecase=True)) == ['bible.62.4.1']
+
+    def test_iter_scan(self):
+        found = list(scan.iter_scan(io.StringIO('Read Mk 4:1-9;\n5:2 and\nLk 3:1\n')))
+        assert refids(found) == ['bible.62.4.1-62.4.9', 'bible.62.5.2', 'bible.63.3.1']
+        assert found[1] == scan.ScannedReference(15, 18, core.makeBiblerefFromDTR('bible.62.5.2'))
@@ -0,0 +1,63 @@
+"""Test bitmap sets of verses. """
+
+import pytest
+
+from biblelib import books, core, sets
+
+
+def refset(*dtrs, bibletype='bible'):
+    return sets.ReferenceSet([core.makeBiblerefFromDTR(dtr) for dtr in dtrs], bibletype=bibletype)
+
+
+class Test_ReferenceSet(object):
+    def test_add_remove(self):
+        mark4 = refset('bible.62.4')
+        assert len(mark4) == 41
+        assert core.makeBiblerefFromDTR('bible.62.4.1-62.4.9') in mark4
+        assert core.makeBiblerefFromDTR('bible.62.4.40-62.5.2') not in mark4
+        assert mark4.overlaps(core.makeBiblerefFromDTR('bible.62.4.40-62.5.2'))
+        mark4.remove(core.makeBiblerefFromDTR('bible.62.4.1-62.4.9'))
+        assert len(mark4) == 32
+        with pytest.raises(KeyError):
+            mark4.remove(core.makeBiblerefFromDTR('bible.62.4.9'))
+        mark4.discard(core.makeBiblerefFromDTR('bible.62.4.1-62.4.20'))
+        assert list(mark4) == [core.makeBiblerefFromDTR('bible.62.4.21-62.4.41')]
+        mark4.clear()
+        assert not mark4 and list(mark4) == []
+
+    def test_algebra(self):
+        a = refset('bible.62.4.1-62.4.20')
+        b = refset('bible.62.4.10-62.4.30')
+        assert len(a | b) == 30
+        assert list(a & b) == [core.makeBiblerefFromDTR('bible.62.4.10-62.4.20')]
+        assert list(a - b) == [core.makeBiblerefFromDTR('bible.62.4.1-62.4.9')]
+        assert list(a ^ b) == [core.makeBiblerefFromDTR('bible.62.4.1-62.4.9'),
+                               core.makeBiblerefFromDTR('bible.62.4.21-62.4.30')]
+        assert a.union(b) == b | a
+        assert (a & b) <= a and a >= (a & b) and not a <= b
+        c = a.copy()
+        c |= b
+        c -= a
+        assert c == b - a and a == refset('bible.62.4.1-62.4.20')
+        with pytest.raises(AssertionError):
+            a | refset('bible+lxx.62.4', bibletype='bible+lxx')
+
+    def test_iteration(self):
+        # adjacent references are merged, and split at book boundaries
+        found = refset('bible.62.4.9', 'bible.62.4.10-62.4.12', 'bible.62.16.20', 'bible.63.1.1')
+        assert list(found) == [core.makeBiblerefFromDTR('bible.62.4.9-62.4.12'),
+                               core.makeBiblerefFromDTR('bible.62.16.20'),
+                               core.makeBiblerefFromDTR('bible.63.1.1')]
+        # runs of ordinals cross books
+        mk49 = core.makeBiblerefFromDTR('bible.62.4.9').ordinal
+        mk1620 = core.makeBiblerefFromDTR('bible.62.16.20').ordinal
+        assert list(found.runs()) == [(mk49, mk49 + 3), (mk1620, mk1620 + 1)]
+        everything = sets.ReferenceSet.from_ordinals(range(books.n_ordinals))
+        assert len(everything) == books.n_ordinals
+        assert len(list(everything)) == 87
+
+    def test_from_ordinals(self):
+        mark = core.makeBiblerefFromDTR('bible.62')
+        assert sets.ReferenceSet.from_ordinals(mark.iterverses(form='ordinal')) == refset('bible.62')
+        first, last = core.makeBiblerefFromDTR('bible.62.4').ordinals
+        assert list(refset('bible.62.4').ordinals()) == list(range(first, last + 1))
@@ -0,0 +1,83 @@
+"""Test versification tables and mapping between datatypes. """
+
+import pytest
+
+from biblelib import books, core, versification
+
+
+def dtr(ref):
+    return core.makeBiblerefFromDTR(ref)
+
+
+class Test_Versification(object):
+    def test_tables(self):
+        bhs = versification.get_versification('bible+bhs')
+        assert bhs is versification.get_versification('bible+bhs')
+        assert bhs.get_book(39).get_chapters() == [1, 2, 3]
+        assert bhs.get_book(29).finalverses == {1: 20, 2: 27, 3: 5, 4: 21}
+        # unchanged books are shared
+        assert bhs.get_book(62) is books.Book(62)
+        assert bhs.n_ordinals == books.n_ordinals
+        assert bhs.get_ordinal_bcv(dtr('bible+bhs.39.3.24').ordinal) == (39, 3, 24)
+        assert core.VerserefFromIndex('bible+bhs', 39, 54) is dtr('bible+bhs.39.3.24')
+        assert versification.get_versification('bible+esv').to_bible is None
+        assert 19 in bhs.unmapped
+
+    def test_validation(self):
+        assert dtr('bible+bhs.29.4.21').refid == 'bible+bhs.29.4.21'
+        with pytest.raises(core.ReferenceValidationError):
+            dtr('bible+bhs.39.4.1')
+        with pytest.raises(core.ReferenceValidationError):
+            dtr('bible.29.4.1')
+
+    def test_map_ordinal(self):
+        mal41 = dtr('bible.39.4.1').ordinal
+        assert versification.map_ordinal(mal41, 'bible', 'bible+bhs') == dtr('bible+bhs.39.3.19').ordinal
+        assert versification.map_ordinal(dtr('bible+bhs.39.3.19').ordinal, 'bible+bhs', 'bible') == mal41
+        assert versification.map_ordinal(mal41, 'bible', 'bible+esv') == mal41
+        # through 'bible', for datatypes that both have data
+        mark49 = dtr('bible+bhs.62.4.9').ordinal
+        assert versification.map_ordinal(mark49, 'bible+bhs', 'bible+lxx') == mark49
+        # no data for Malachi in bible+lxx, or for Psalms in bible+bhs
+        with pytest.raises(versification.VersificationError, match='Mal in bible[+]lxx'):
+            versification.map_ordinal(mal41, 'bible+bhs', 'bible+lxx')
+        with pytest.raises(versification.VersificationError, match='Psalm in bible[+]bhs'):
+            versification.map_ordinal(dtr('bible.19.51.1').ordinal, 'bible', 'bible+bhs')
+
+    def test_map_ordinals(self):
+        bhs = versification.get_versification('bible+bhs')
+        ordinals = [ordinal for ordinal in range(books.n_ordinals)
+                    if books.get_ordinal_bcv(ordinal)[0] not in bhs.unmapped]
+        mapped = versification.map_ordinals(ordinals, 'bible', 'bible+bhs')
+        assert sorted(mapped) == [ordinal for ordinal in range(bhs.n_ordinals)
+                                  if bhs.get_ordinal_bcv(ordinal)[0] not in bhs.unmapped]
+        assert list(versification.map_ordinals(mapped, 'bible+bhs', 'bible')) == ordinals
+        with pytest.raises(versification.VersificationError):
+            versification.map_ordinals(range(books.n_ordinals), 'bible', 'bible+bhs')
+
+
+class Test_to_bibletype(object):
+    @pytest.mark.parametrize('ref, mapped', [
+        ('bible.39.4.1-39.4.6', ['bible+bhs.39.3.19-39.3.24']),
+        ('bible.29.3', ['bible+bhs.29.4']),
+        ('bible.29.2', ['bible+bhs.29.2-29.3']),
+        ('bible.29.2.27-29.3.2', ['bible+bhs.29.2.27-29.4.2']),
+        ('bible.1.31.55', ['bible+bhs.1.32.1']),
+        ('bible.1.31.50-1.32.5', ['bible+bhs.1.31.50-1.32.6']),
+        ('bible.39', ['bible+bhs.39']),
+        ('bible.62.4.9', ['bible+bhs.62.4.9']),
+    ])
+    def test_to_bibletype(self, ref, mapped):
+        refs = dtr(ref).to_bibletype('bible+bhs')
+        assert [ref.refid for ref in refs] == mapped
+        assert [back for ref in refs for back in ref.to_bibletype('bible')] == [dtr(ref)]
+
+    def test_same_numbering(self):
+        assert dtr('bible.19.3.title').to_bibletype('bible+esv') == [dtr('bible+esv.19.3.title')]
+        assert dtr('bible.62.4.9').to_bibletype('bible+lxx') == [dtr('bible+lxx.62.4.9')]
+
+    def test_unmapped(self):
+        with pytest.raises(versification.VersificationError, match='Psalm in bible[+]bhs'):
+            dtr('bible.19.50-19.52').to_bibletype('bible+bhs')
+        with pytest.raises(versification.VersificationError, match='Psalm in bible[+]lxx'):
+            dtr('bible+lxx.19.3.1').to_bibletype('bible')
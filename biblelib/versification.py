@@ -0,0 +1,290 @@
+"""Versification: how each Bible datatype numbers chapters and verses,
+and mapping verses between datatypes.
+
+Datatypes number some verses differently: Malachi 4:1-6 in English
+Bibles is 3:19-24 in the Hebrew Bible (bible+bhs), so BHS Malachi has
+only three chapters. Each datatype has its own books (see books.py)
+where its chapters differ, and so its own ordinal space. References
+are validated against the books for their datatype.
+
+>>> from biblelib import core, versification
+>>> core.makeBiblerefFromDTR('bible.39.4.1-39.4.6').to_bibletype('bible+bhs')
+[RangeVerseref('bible+bhs.39.3.19-39.3.24')]
+>>> mal41 = core.makeBiblerefFromDTR('bible.39.4.1')
+>>> versification.map_ordinal(mal41.ordinal, 'bible', 'bible+bhs')
+23145
+
+Mapping pivots through 'bible': each datatype has integer arrays from
+its ordinals to 'bible' ordinals and back, with -1 for verses that
+have no counterpart. For any two datatypes, these are composed once
+into a single array, so mapping a verse is one lookup, and
+map_ordinals() maps a whole NumPy array of ordinals at a time.
+
+Datatypes that aren't in _VERSIFICATION_DATA (the English Bibles and
+Greek New Testaments) are taken to number everything like 'bible', so
+mapping to or from them is the identity. Books that a datatype is
+known to number differently, but there's no data for yet, are listed
+as unmapped: mapping any of their verses raises VersificationError,
+rather than silently treating them as the same.
+
+>>> core.makeBiblerefFromDTR('bible.19.51.1').to_bibletype('bible+bhs')
+Traceback (most recent call last):
+...
+biblelib.versification.VersificationError: No versification data for Psalm in bible+bhs
+
+Data is compiled the first time a datatype is used.
+
+Caveats:
+
+* there's only data for a few well-known differences in bible+bhs so
+  far: Gen 31-32, Joel 2-4 and Mal 3-4. Its other books with
+  differences, like Psalms, are unmapped, as are all the Old Testament
+  and deuterocanonical books in bible+lxx and bible+lxx2.
+* Psalm titles (verse 0) aren't mapped separately from verse 1.
+
+"""
+
+from array import array
+from bisect import bisect_right
+
+from . import books
+from .books import BibleBook, Book
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# for each datatype that numbers verses differently from 'bible':
+# - finalverses: changes to the chapters of books, as
+#   {book: {chapter: final verse, or None if there's no such chapter}}
+# - mappings: runs of verses numbered differently, as (book, chapter,
+#   first verse, last verse) in 'bible' and (chapter, first verse) in
+#   the datatype
+# - unmapped: books numbered differently that there's no data for yet
+_VERSIFICATION_DATA = {
+    'bible+bhs': {
+        'finalverses': {
+            1: {31: 54, 32: 33},
+            29: {2: 27, 3: 5, 4: 21},
+            39: {3: 24, 4: None},
+        },
+        'mappings': [
+            (1, 31, 55, 55, 32, 1),
+            (1, 32, 1, 32, 32, 2),
+            (29, 2, 28, 32, 3, 1),
+            (29, 3, 1, 21, 4, 1),
+            (39, 4, 1, 6, 3, 19),
+        ],
+        'unmapped': [2, 3, 4, 5, 9, 10, 11, 12, 13, 14, 16, 18, 19, 21, 22, 23, 24, 26, 27,
+                     28, 32, 33, 34, 38],
+    },
+    'bible+lxx': {'finalverses': {}, 'mappings': [], 'unmapped': list(range(1, 61))},
+    'bible+lxx2': {'finalverses': {}, 'mappings': [], 'unmapped': list(range(1, 61))},
+}
+
+# in mapping arrays: verses without a counterpart, and verses in
+# unmapped books
+MISSING = -1
+UNMAPPED = -2
+
+# datatype -> compiled Versification
+_VERSIFICATIONS = {}
+# (source, target) -> array mapping source ordinals to target
+# ordinals, or None if they're the same
+_MAPPINGS = {}
+
+
+class VersificationError(Exception):
+    """There's no versification data to map some verses."""
+    pass
+
+
+class Versification(object):
+    """The books and ordinal space of a Bible DATATYPE, and its
+    mapping to and from 'bible' ordinals.
+
+    BOOKS maps book indices to BibleBook objects for books that differ
+    from 'bible'. TO_BIBLE and FROM_BIBLE are arrays of ordinals, with
+    -1 for verses without a counterpart and -2 for verses in UNMAPPED
+    books, or None if the datatype numbers everything like 'bible'.
+    """
+    def __init__(self, datatype, books=None, to_bible=None, from_bible=None, unmapped=()):
+        self.datatype = datatype
+        self.books = books or {}
+        self.to_bible = to_bible
+        self.from_bible = from_bible
+        self.unmapped = frozenset(unmapped)
+        # first ordinal of each book, in order
+        self._offsets = [self.get_book(index).ordinal_offset for index in range(1, 88)]
+        lastbook = self.get_book(87)
+        self.n_ordinals = lastbook.ordinal_offset + lastbook.n_verses
+
+    def __repr__(self):
+        return "<Versification: {}>".format(self.datatype)
+
+    def get_book(self, index):
+        """Return the BibleBook for INDEX in this datatype."""
+        return self.books.get(index) or Book(index)
+
+    def get_ordinal_bcv(self, ordinal):
+        """Return a tuple of book index, chapter and verse for ORDINAL."""
+        if not self.books:
+            return books.get_ordinal_bcv(ordinal)
+        assert 0 <= ordinal < self.n_ordinals, f"Invalid ordinal: {ordinal}"
+        book = self.get_book(bisect_right(self._offsets, ordinal))
+        return (book.index, *book.get_vindex_chapter_verse(ordinal - book.ordinal_offset))
+
+
+def _compile(datatype):
+    """Return a Versification for DATATYPE from _VERSIFICATION_DATA."""
+    data = _VERSIFICATION_DATA.get(datatype)
+    if data is None:
+        return Versification(datatype)
+    changed = {}
+    for index, changes in data['finalverses'].items():
+        bible = Book(index)
+        finalverses = dict(bible.finalverses)
+        finalverses.update(changes)
+        finalverses = {chapter: verse for chapter, verse in sorted(finalverses.items())
+                       if verse is not None}
+        changed[index] = BibleBook(index, bible.fullname, bible.shortname, bible.ldlsrefname,
+                                   bible.etdname, bible.alternates, finalverses)
+    offset = 0
+    for index in range(1, 88):
+        book = changed.get(index) or Book(index)
+        if book.ordinal_offset != offset:
+            if index not in changed:
+                # after a book with a different number of verses
+                book = changed[index] = BibleBook(book.index, book.fullname, book.shortname,
+                                                  book.ldlsrefname, book.etdname, book.alternates,
+                                                  dict(book.finalverses))
+            book.ordinal_offset = offset
+        offset += book.n_verses
+    to_bible = array('i', [MISSING]) * offset
+    from_bible = array('i', [MISSING]) * books.n_ordinals
+    for book, chapter, first, last, tochapter, tofirst in data['mappings']:
+        source, target = Book(book), changed[book]
+        for i in range(last - first + 1):
+            bibleordinal = source.get_ordinal(chapter, first + i)
+            ordinal = target.get_ordinal(tochapter, tofirst + i)
+            from_bible[bibleordinal] = ordinal
+            to_bible[ordinal] = bibleordinal
+    # everything else keeps its number, if the datatype has it
+    mapped = {mapping[0] for mapping in data['mappings']}
+    unmapped = data.get('unmapped', ())
+    for index in range(1, 88):
+        source = Book(index)
+        target = changed.get(index) or source
+        if index in unmapped:
+            from_bible[source.ordinal_offset:source.ordinal_offset + source.n_verses] = \
+                array('i', [UNMAPPED]) * source.n_verses
+            to_bible[target.ordinal_offset:target.ordinal_offset + target.n_verses] = \
+                array('i', [UNMAPPED]) * target.n_verses
+            continue
+        if index not in mapped and target.finalverses == source.finalverses:
+            first = source.ordinal_offset
+            n = source.n_verses
+            from_bible[first:first + n] = array('i', range(target.ordinal_offset,
+                                                           target.ordinal_offset + n))
+            to_bible[target.ordinal_offset:target.ordinal_offset + n] = array('i', range(first, first + n))
+            continue
+        for vindex in range(source.n_verses):
+            bibleordinal = source.ordinal_offset + vindex
+            if from_bible[bibleordinal] >= 0:
+                continue
+            chapter, verse = source.get_vindex_chapter_verse(vindex)
+            if target.has_chapterandverse(chapter, verse):
+                ordinal = target.get_ordinal(chapter, verse)
+                if to_bible[ordinal] < 0:
+                    from_bible[bibleordinal] = ordinal
+                    to_bible[ordinal] = bibleordinal
+    return Versification(datatype, changed, to_bible, from_bible, unmapped)
+
+
+def get_versification(datatype='bible'):
+    """Return the Versification for DATATYPE, compiling it the first
+    time."""
+    versification = _VERSIFICATIONS.get(datatype)
+    if versification is None:
+        versification = _VERSIFICATIONS[datatype] = _compile(datatype)
+    return versification
+
+
+def get_book(index, datatype='bible'):
+    """Return the BibleBook for INDEX in DATATYPE."""
+    versification = _VERSIFICATIONS.get(datatype) or get_versification(datatype)
+    return versification.books.get(index) or Book(index)
+
+
+def get_mapping(source, target):
+    """Return an array mapping SOURCE ordinals to TARGET ordinals (-1
+    for verses without a counterpart, -2 for verses in books that
+    either datatype has no data for), or None if the two datatypes
+    number verses the same way."""
+    key = (source, target)
+    if key in _MAPPINGS:
+        return _MAPPINGS[key]
+    to_bible = get_versification(source).to_bible
+    from_bible = get_versification(target).from_bible
+    if source == target or (to_bible is None and from_bible is None):
+        mapping = None
+    elif from_bible is None:
+        mapping = to_bible
+    elif to_bible is None:
+        mapping = from_bible
+    else:
+        mapping = array('i', [ordinal if ordinal < 0 else from_bible[ordinal] for ordinal in to_bible])
+    _MAPPINGS[key] = mapping
+    return mapping
+
+
+def unmapped_error(ordinal, source, target):
+    """Return a VersificationError for ORDINAL in SOURCE, which is in a
+    book without data for mapping to TARGET."""
+    versification = get_versification(source)
+    book = versification.get_book(versification.get_ordinal_bcv(ordinal)[0])
+    datatype = source if book.index in versification.unmapped else target
+    return VersificationError("No versification data for {} in {}".format(book.shortname, datatype))
+
+
+def map_ordinal(ordinal, source='bible', target='bible'):
+    """Return the TARGET ordinal for ORDINAL in SOURCE, or -1 if it has
+    no counterpart. Raise VersificationError if either datatype has no
+    data for its book."""
+    try:
+        mapping = _MAPPINGS[(source, target)]
+    except KeyError:
+        mapping = get_mapping(source, target)
+    if mapping is None:
+        return ordinal
+    mapped = mapping[ordinal]
+    if mapped == UNMAPPED:
+        raise unmapped_error(ordinal, source, target)
+    return mapped
+
+
+def map_ordinals(ordinals, source='bible', target='bible'):
+    """Return the TARGET ordinals for ORDINALS in SOURCE, with -1 for
+    those without a counterpart: a NumPy array for a NumPy array (or
+    any sequence if NumPy is installed), otherwise a list. Raise
+    VersificationError if either datatype has no data for any of their
+    books."""
+    mapping = get_mapping(source, target)
+    if np is not None:
+        ordinals = np.asarray(ordinals)
+        if mapping is None:
+            return ordinals.copy()
+        mapped = np.frombuffer(mapping, dtype=np.int32)[ordinals]
+        unmapped = np.flatnonzero(mapped == UNMAPPED)
+        if len(unmapped):
+            raise unmapped_error(int(ordinals.flat[unmapped[0]]), source, target)
+        return mapped
+    ordinals = list(ordinals)
+    if mapping is None:
+        return ordinals
+    mapped = [mapping[ordinal] for ordinal in ordinals]
+    if UNMAPPED in mapped:
+        raise unmapped_error(ordinals[mapped.index(UNMAPPED)], source, target)
+    return mapped
@@ -23,6 +23,11 @@ VERSION = None
 # What packages are required for this module to be executed?
 REQUIRED = ['pytest']
 
+# What packages are optional?
+EXTRAS = {
+    'arrays': ['numpy'],
+}
+
 # The rest you shouldn't have to touch too much :)
 # ------------------------------------------------
 # Except, perhaps the License and Trove Classifiers!
@@ -95,10 +100,11 @@ setup(
     # If your package is a single module, use this instead of 'packages':
     # py_modules=['mypackage'],
 
-    # entry_points={
-    #     'console_scripts': ['mycli=mymodule:cli'],
-    # },
+    entry_points={
+        'console_scripts': ['biblelib=biblelib.cli:main'],
+    },
     install_requires=REQUIRED,
+    extras_require=EXTRAS,
     include_package_data=True,
     license='MIT',
     classifiers=[